@@ -1,33 +1,112 @@
 """Growatt Modbus Integration for Home Assistant."""
+import asyncio
 import logging
+import time
+from collections.abc import Callable, Iterable
+from contextlib import aclosing
 from datetime import timedelta
+from typing import Any
+
+from pymodbus.exceptions import ModbusException
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_CONFIG_ENTRY_ID, SUN_EVENT_SUNRISE, Platform
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    Event,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.sun import get_astral_event_next, is_up
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
-from .modbus_client import GrowattModbusClient
+from .archive import SampleArchive
+from .const import (
+    ARCHIVE_NONE,
+    ATTR_KEYS,
+    CONF_ARCHIVE_FORMAT,
+    CONF_BAUDRATE,
+    CONF_HISTORY_WINDOW,
+    CONF_PIPELINING,
+    CONF_PROFILE,
+    CONF_SERIAL,
+    CONF_TRANSPORT,
+    DATA_STARTUP_SLOTS,
+    DEFAULT_BAUDRATE,
+    DEFAULT_HISTORY_WINDOW,
+    DEFAULT_PROFILE,
+    DEFAULT_STREAM_INTERVAL,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    SERVICE_GET_STATISTICS,
+    SLEEP_WAKE_MARGIN,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+    STARTUP_REFRESH_CONCURRENCY,
+    STATUS_STANDBY,
+)
+from .controller import ControlState, ExportLimitController
+from .modbus_client import AsyncGrowattModbusClient
+from .ring_buffer import SampleHistory
+from .sensor import DEADBANDS, REQUIRED_KEYS
 
 _LOGGER = logging.getLogger(__name__)
 
+_UNSET = object()
+
 PLATFORMS = [Platform.SENSOR, Platform.SWITCH, Platform.NUMBER, Platform.BUTTON]
 
+GET_STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_KEYS): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the Growatt Modbus component."""
     hass.data.setdefault(DOMAIN, {})
+
+    async def async_get_statistics(call: ServiceCall) -> ServiceResponse:
+        """Return the rolling statistics of an inverter's registers."""
+        entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+        if entry_id not in hass.data[DOMAIN]:
+            raise ServiceValidationError(f"Growatt inverter {entry_id} is not loaded")
+        coordinator = hass.data[DOMAIN][entry_id]["coordinator"]
+        return coordinator.rolling_statistics(call.data.get(ATTR_KEYS))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_STATISTICS,
+        async_get_statistics,
+        schema=GET_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Growatt Modbus from a config entry."""
     
     # Create Modbus client
-    client = GrowattModbusClient(
+    client = AsyncGrowattModbusClient(
         host=entry.data["host"],
         port=entry.data["port"],
         slave=entry.data["slave"],
         timeout=entry.data.get("timeout", 5),
+        profile=entry.data.get(CONF_PROFILE, DEFAULT_PROFILE),
+        transport=entry.data.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
+        baudrate=entry.data.get(CONF_BAUDRATE, DEFAULT_BAUDRATE),
+        pipelining=entry.options.get(CONF_PIPELINING, False),
     )
     
     # Create coordinator for data updates
@@ -37,14 +116,57 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry=entry,
     )
     
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
+    # Poll only what the enabled entities show
+    coordinator.async_update_plan()
+    entry.async_on_unload(
+        hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED, coordinator.async_registry_updated
+        )
+    )
+
+    # Start from the last snapshot and poll in the background, the first
+    # setup has none and waits for a live poll
+    try:
+        restored = await coordinator.async_restore()
+        if not restored:
+            await coordinator.async_config_entry_first_refresh()
+    except BaseException:
+        # Unload never runs for a failed setup, release the shared
+        # connection so the retry starts from a clean one
+        await client.close()
+        raise
+
+    # Started only once setup can no longer fail, unload closes it
+    archive = None
+    if entry.options.get(CONF_ARCHIVE_FORMAT, ARCHIVE_NONE) != ARCHIVE_NONE:
+        archive = SampleArchive(
+            hass, entry.data["name"], entry.data.get(CONF_SERIAL), entry.options
+        )
+        archive.async_start()
+        coordinator.archive = archive
+
+    if restored:
+        slots = hass.data.setdefault(
+            DATA_STARTUP_SLOTS, asyncio.Semaphore(STARTUP_REFRESH_CONCURRENCY)
+        )
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_startup_refresh(slots),
+            f"{coordinator.name} startup refresh",
+        )
+
+    controller = ExportLimitController(hass, coordinator, entry.options)
+    controller.async_start()
+    entry.async_on_unload(controller.async_stop)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     
     # Store coordinator
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
         "client": client,
+        "controller": controller,
+        "archive": archive,
     }
     
     # Setup platforms
@@ -52,6 +174,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored snapshot of a removed entry."""
+    await _snapshot_store(hass, entry).async_remove()
+
+def _snapshot_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the storage of an entry's last snapshot."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry.entry_id}")
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -59,28 +193,344 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         data = hass.data[DOMAIN].pop(entry.entry_id)
         await data["client"].close()
+        if data["archive"] is not None:
+            await data["archive"].async_close()
     
     return unload_ok
 
 
 class GrowattDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching Growatt data."""
+    """Class to manage fetching Growatt data.
 
-    def __init__(self, hass, client, entry):
+    Polls the register blocks of the enabled entities, each at its own
+    interval, and tells entities which values moved past their deadband.
+    """
+
+    def __init__(self, hass, client, entry, deadbands=None):
         """Initialize."""
         self.client = client
         self.entry = entry
-        
+        self.control = ControlState()
+        self._deadbands = DEADBANDS if deadbands is None else deadbands
+        self._reported = {}
+        self._changed: set[str] | None = None
+        self._notified_success = None
+        self._sleeping = False
+        self._wake_at = None
+        self._woken = False
+        self._awake = asyncio.Event()
+        self._awake.set()
+        self.restored = False
+        self.archive: SampleArchive | None = None
+        self._startup_pending = False
+        self._store = _snapshot_store(hass, entry)
+        self._save_at = 0.0
+        self._next_poll = [0.0] * len(client.decode_plan)
+        self._tick = min(decoder.block.interval for decoder in client.decode_plan)
+
+        intervals = {
+            key: decoder.block.interval
+            for decoder in client.decode_plan
+            for key in decoder.keys
+        }
+        intervals["pv_power"] = self._tick
+        window = entry.options.get(CONF_HISTORY_WINDOW, DEFAULT_HISTORY_WINDOW)
+        self.history = SampleHistory(window * 60, intervals)
+
         super().__init__(
             hass,
             _LOGGER,
             name=f"{DOMAIN}_{entry.data['name']}",
-            update_interval=timedelta(seconds=5),
+            update_interval=timedelta(seconds=self._tick),
         )
 
+    @property
+    def sleeping(self) -> bool:
+        """Return True while polling is paused for the night."""
+        return self._sleeping
+
+    def _night_until(self):
+        """Return the wake up time if it is night, None otherwise."""
+        if is_up(self.hass):
+            return None
+        wake_at = get_astral_event_next(self.hass, SUN_EVENT_SUNRISE) - SLEEP_WAKE_MARGIN
+        return wake_at if wake_at > dt_util.utcnow() else None
+
+    async def _async_sleep(self, wake_at) -> None:
+        """Close the socket and pause polling until wake_at.
+
+        Called after sunset for an inverter in standby without PV power or
+        one that stopped answering. Entities keep their last values.
+        """
+        _LOGGER.info(f"{self.name} sleeping until {dt_util.as_local(wake_at)}")
+        self._sleeping = True
+        self._wake_at = wake_at
+        self._changed = None
+        self._awake.clear()
+        await self.client.suspend()
+        self.update_interval = wake_at - dt_util.utcnow()
+
+    async def _async_wake(self) -> None:
+        """Resume polling all register blocks."""
+        _LOGGER.info(f"{self.name} waking up")
+        self._sleeping = False
+        self._woken = True
+        self._next_poll = [0.0] * len(self._next_poll)
+        # The inverter was off overnight, read its settings again
+        self.client.holding.invalidate()
+        await self.client.resume()
+        self._awake.set()
+        self.update_interval = timedelta(seconds=self._tick)
+
+    @callback
+    def async_update_plan(self) -> None:
+        """Rebuild the read plan from the entities that are not disabled.
+
+        Entities not registered yet count as enabled, so the first setup
+        reads everything.
+        """
+        registry = er.async_get(self.hass)
+        prefix = f"{self.entry.entry_id}_"
+        disabled = {
+            entity.unique_id.removeprefix(prefix)
+            for entity in er.async_entries_for_config_entry(registry, self.entry.entry_id)
+            if entity.disabled_by is not None
+        }
+        previous = dict(
+            zip((decoder.block for decoder in self.client.decode_plan), self._next_poll)
+        )
+        self.client.select((self.client.keys - disabled) | REQUIRED_KEYS)
+        plan = self.client.decode_plan
+        # Blocks kept from the old plan stay on their schedule
+        self._next_poll = [previous.get(decoder.block, 0.0) for decoder in plan]
+        self._tick = min(decoder.block.interval for decoder in plan)
+        if not self._sleeping:
+            self.update_interval = timedelta(seconds=self._tick)
+        _LOGGER.debug(
+            f"{self.name} polling {sum(len(decoder.keys) for decoder in plan)} "
+            f"registers in {len(plan)} blocks"
+        )
+
+    @callback
+    def async_registry_updated(self, event: Event) -> None:
+        """Rebuild the read plan after an entity was enabled or disabled."""
+        if event.data["action"] == "update" and "disabled_by" not in event.data["changes"]:
+            return
+        entity = er.async_get(self.hass).async_get(event.data["entity_id"])
+        if entity is not None and entity.config_entry_id != self.entry.entry_id:
+            return
+        self.async_update_plan()
+
+    async def async_restore(self) -> bool:
+        """Start from the stored snapshot, False if there is none.
+
+        The last good snapshot is saved after polls. Entities restored from
+        it are flagged until the first live poll.
+        """
+        stored = await self._store.async_load()
+        if not stored or not stored.get("data"):
+            return False
+        keys = self.client.keys
+        self.data = {key: value for key, value in stored["data"].items() if key in keys}
+        self.restored = True
+        self._startup_pending = True
+        return True
+
+    async def async_startup_refresh(self, slots: asyncio.Semaphore) -> None:
+        """Run the first live poll after starting from a snapshot.
+
+        An inverter that was asleep when the snapshot was taken and it is
+        still night is not polled at all.
+        """
+        data = self.data
+        if (
+            data.get("status") == STATUS_STANDBY
+            and not data.get("pv_power")
+            and (wake_at := self._night_until()) is not None
+        ):
+            self._startup_pending = False
+            await self._async_sleep(wake_at)
+            self.async_update_listeners()
+            return
+        async with slots:
+            self._startup_pending = False
+            await self.async_refresh()
+
+    @callback
+    def _snapshot(self) -> dict[str, Any]:
+        """Return the data to store."""
+        return {"data": self.data}
+
     async def _async_update_data(self):
-        """Fetch data from Growatt inverter."""
+        """Fetch due register blocks from Growatt inverter.
+
+        The coordinator ticks at the shortest block interval and merges the
+        blocks that are due into the previous snapshot, all requested at
+        once when pipelining. Holding registers come from the client's
+        write-through cache, so written settings show up on the next tick.
+        The values read also go to the history and the archive.
+        """
+        if self._startup_pending:
+            # Scheduled refreshes wait for the startup refresh's turn
+            return self.data
+        if self._sleeping:
+            if dt_util.utcnow() < self._wake_at:
+                return self.data
+            await self._async_wake()
+
+        now = time.monotonic()
+        # Half a tick of slack keeps slow blocks from slipping a whole tick
+        horizon = now + self._tick / 2
+        data = dict(self.data or {})
+        stats = self.client.stats
+        stats.start_poll()
+        success = True
+        read_keys = ["pv_power"]
+
+        plan = self.client.decode_plan
+        due = [index for index in range(len(plan)) if self._next_poll[index] <= horizon]
+
         try:
-            return await self.hass.async_add_executor_job(self.client.read_all_data)
+            results = await self.client.read_blocks([plan[index] for index in due], data)
+            for index, read in zip(due, results):
+                # Failed blocks stay due and are retried on the next tick
+                if read:
+                    self._next_poll[index] = now + plan[index].block.interval
+                    read_keys.extend(plan[index].keys)
+                else:
+                    success = False
         except Exception as err:
-            raise UpdateFailed(f"Error communicating with inverter: {err}")
\ No newline at end of file
+            stats.finish_poll(time.monotonic() - now, success=False)
+            # An inverter that went quiet after sunset has shut down for the night
+            if (wake_at := self._night_until()) is not None:
+                await self._async_sleep(wake_at)
+                return self.data or {}
+            raise UpdateFailed(f"Error communicating with inverter: {err}")
+
+        stats.finish_poll(time.monotonic() - now, success)
+
+        self.client.add_derived_values(data)
+        self.history.record(now, data, read_keys)
+        if self.archive is not None:
+            self.archive.record(time.time(), {key: data.get(key) for key in read_keys})
+        self._changed = self._diff(data)
+        if self.restored or self._woken:
+            # Write every entity once to drop the restored or sleeping flag,
+            # values still at their pre-dawn reading would not be written
+            self._changed = None
+            self.restored = False
+            self._woken = False
+        if now >= self._save_at:
+            self._save_at = now + SNAPSHOT_SAVE_DELAY
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+        if (
+            data.get("status") == STATUS_STANDBY
+            and not data.get("pv_power")
+            and (wake_at := self._night_until()) is not None
+        ):
+            await self._async_sleep(wake_at)
+        return data
+
+    async def async_refresh_settings(self) -> None:
+        """Read the holding registers from the inverter instead of the cache."""
+        self.client.holding.invalidate()
+        self._next_poll = [
+            0.0 if decoder.block.register_type == "holding" else next_poll
+            for decoder, next_poll in zip(self.client.decode_plan, self._next_poll)
+        ]
+        await self.async_request_refresh()
+
+    def rolling_statistics(self, keys: Iterable[str] | None = None) -> dict[str, Any]:
+        """Return count, min, max and mean over the history window per key.
+
+        The ring buffers keep them up to date incrementally, so this is
+        cheap enough for every state write.
+        """
+        now = time.monotonic()
+        keys = self.history.keys() if keys is None else keys
+        return {key: self.history.statistics(key, now) for key in keys}
+
+    @callback
+    def async_subscribe_stream(
+        self,
+        keys: Iterable[str],
+        update_callback: Callable[[dict[str, Any]], None],
+        interval: float = DEFAULT_STREAM_INTERVAL,
+    ) -> CALLBACK_TYPE:
+        """Call update_callback with the values of keys every interval seconds.
+
+        Returns a function that ends the subscription. The stream pauses
+        while the coordinator sleeps and restarts after connection failures.
+        """
+        keys = tuple(keys)
+        # Fail on unknown keys here rather than in the background task
+        self.client.stream_plan(keys)
+        task = self.entry.async_create_background_task(
+            self.hass,
+            self._async_stream(keys, update_callback, interval),
+            f"{self.name} stream {', '.join(keys)}",
+        )
+
+        @callback
+        def unsubscribe() -> None:
+            task.cancel()
+
+        return unsubscribe
+
+    async def _async_stream(
+        self,
+        keys: tuple[str, ...],
+        update_callback: Callable[[dict[str, Any]], None],
+        interval: float,
+    ) -> None:
+        """Feed a stream subscriber until it unsubscribes."""
+        while True:
+            await self._awake.wait()
+            try:
+                async with aclosing(self.client.stream(keys, interval)) as stream:
+                    async for data in stream:
+                        if self._sleeping:
+                            break
+                        update_callback(data)
+            except ModbusException as err:
+                _LOGGER.debug(f"{self.name} stream interrupted: {err}")
+                await asyncio.sleep(max(interval, self.client.breaker.retry_in))
+            except Exception as err:  # noqa: BLE001 - keeps the stream alive
+                # Anything else would end the task silently and the
+                # subscriber would never be fed again
+                _LOGGER.warning(f"{self.name} stream failed: {err!r}")
+                await asyncio.sleep(max(interval, self.client.breaker.retry_in))
+
+    def _diff(self, data) -> set[str]:
+        """Return the keys that moved past their deadband since last reported."""
+        changed = set()
+        for key, value in data.items():
+            reported = self._reported.get(key, _UNSET)
+            if value == reported:
+                continue
+            if (
+                value is not None
+                and isinstance(reported, (int, float))
+                and abs(value - reported) < self._deadbands.get(key, 0)
+            ):
+                continue
+            self._reported[key] = value
+            changed.add(key)
+        return changed
+
+    def has_changed(self, *keys: str) -> bool:
+        """Return True if an entity using these keys needs a state write.
+
+        Entities ask before writing state, so only those whose value moved
+        past its deadband since they last reported are written.
+        """
+        return self._changed is None or not self._changed.isdisjoint(keys)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners, notifying all of them when availability changed."""
+        if self.last_update_success != self._notified_success:
+            self._notified_success = self.last_update_success
+            self._changed = None
+        super().async_update_listeners()
@@ -0,0 +1,216 @@
+"""Batched time-series archive of the polled values."""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import slugify
+
+from .const import (
+    ARCHIVE_DIR,
+    ARCHIVE_LINE_PROTOCOL,
+    ARCHIVE_MEASUREMENT,
+    ARCHIVE_PARQUET,
+    CONF_ARCHIVE_BATCH,
+    CONF_ARCHIVE_FORMAT,
+    CONF_ARCHIVE_INTERVAL,
+    DEFAULT_ARCHIVE_BATCH,
+    DEFAULT_ARCHIVE_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+Sample = tuple[float, dict[str, Any]]
+
+
+def _escape(text: str, special: str) -> str:
+    """Backslash the characters line protocol treats as delimiters."""
+    for char in "\\" + special:
+        text = text.replace(char, f"\\{char}")
+    return text
+
+
+def _field_value(value: Any) -> str | None:
+    """Format a line protocol field value, None to skip it."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return f"{value}i"
+    # Drop the binary noise of scaled values, e.g. 352.40000000000003
+    return f"{value:.10g}"
+
+
+def format_line_protocol(measurement: str, tags: dict[str, str], samples: list[Sample]) -> str:
+    """Return samples as InfluxDB line protocol, one line per sample."""
+    prefix = ",".join(
+        [_escape(measurement, ", ")]
+        + [
+            f"{_escape(key, ',= ')}={_escape(value, ',= ')}"
+            for key, value in sorted(tags.items())
+            if value
+        ]
+    )
+    lines = []
+    for timestamp, values in samples:
+        fields = ",".join(
+            f"{_escape(key, ',= ')}={formatted}"
+            for key, value in values.items()
+            if (formatted := _field_value(value)) is not None
+        )
+        if fields:
+            lines.append(f"{prefix} {fields} {round(timestamp * 1e9)}")
+    return "".join(f"{line}\n" for line in lines)
+
+
+class SampleArchive:
+    """Appends the values of every poll to time-series files.
+
+    Samples are kept in memory and handed to the executor in one write
+    once ``batch_size`` of them piled up or every ``interval`` seconds, so
+    polls never wait on the disk. Line protocol goes to one file per
+    inverter and UTC day. Parquet files cannot be appended to, so each
+    batch becomes a file of its own with a column per register.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        serial: str | None,
+        options: dict[str, Any],
+    ):
+        """Initialize the archive."""
+        self.hass = hass
+        self.name = name
+        self.format = options[CONF_ARCHIVE_FORMAT]
+        self.interval = options.get(CONF_ARCHIVE_INTERVAL, DEFAULT_ARCHIVE_INTERVAL)
+        self.batch_size = options.get(CONF_ARCHIVE_BATCH, DEFAULT_ARCHIVE_BATCH)
+        self.directory = Path(hass.config.path(ARCHIVE_DIR))
+        self._slug = slugify(name)
+        self._tags = {"inverter": name, "serial": serial or ""}
+        self._samples: list[Sample] = []
+        self._flushing: asyncio.Future | None = None
+        self._unsub_interval: CALLBACK_TYPE | None = None
+        self._unsub_stop: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Flush periodically and when Home Assistant stops."""
+        self._unsub_interval = async_track_time_interval(
+            self.hass, self._async_flush_interval, timedelta(seconds=self.interval)
+        )
+        self._unsub_stop = self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_final_write
+        )
+
+    @property
+    def writing(self) -> bool:
+        """Return True while a batch is being written."""
+        return self._flushing is not None and not self._flushing.done()
+
+    async def async_close(self) -> None:
+        """Stop flushing periodically and write the pending samples."""
+        if self._unsub_interval is not None:
+            self._unsub_interval()
+            self._unsub_interval = None
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+        if self.writing:
+            # Samples recorded meanwhile are written once this batch is,
+            # its errors are logged by the flush that started it
+            await asyncio.wait([self._flushing])
+        await self.async_flush()
+
+    @callback
+    def record(self, timestamp: float, values: dict[str, Any]) -> None:
+        """Queue the values of one poll."""
+        self._samples.append((timestamp, values))
+        if len(self._samples) >= self.batch_size and not self.writing:
+            self.hass.async_create_background_task(
+                self.async_flush(), f"{self.name} archive flush"
+            )
+
+    async def _async_flush_interval(self, _now) -> None:
+        await self.async_flush()
+
+    async def _async_final_write(self, _event: Event) -> None:
+        self._unsub_stop = None
+        await self.async_close()
+
+    async def async_flush(self) -> None:
+        """Write the pending samples.
+
+        One write runs at a time, samples recorded meanwhile wait for the
+        next flush. A batch that cannot be written is dropped.
+        """
+        if self.writing or not self._samples:
+            return
+        samples, self._samples = self._samples, []
+        self._flushing = self.hass.async_add_executor_job(self._write, samples)
+        try:
+            # Cancelling the flush must not hide a write still running
+            await asyncio.shield(self._flushing)
+        except (ImportError, OSError, ValueError) as err:
+            _LOGGER.error(
+                f"Failed to archive {len(samples)} samples of {self.name} "
+                f"to {self.directory}: {err}"
+            )
+
+    def _write(self, samples: list[Sample]) -> None:
+        """Write a batch, runs in the executor."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.format == ARCHIVE_LINE_PROTOCOL:
+            self._write_line_protocol(samples)
+        elif self.format == ARCHIVE_PARQUET:
+            self._write_parquet(samples)
+
+    def _write_line_protocol(self, samples: list[Sample]) -> None:
+        """Append a batch to the line protocol files of its days."""
+        days: dict[str, list[Sample]] = {}
+        for sample in samples:
+            day = datetime.fromtimestamp(sample[0], timezone.utc).strftime("%Y-%m-%d")
+            days.setdefault(day, []).append(sample)
+        for day, day_samples in days.items():
+            text = format_line_protocol(ARCHIVE_MEASUREMENT, self._tags, day_samples)
+            with open(self.directory / f"{self._slug}-{day}.lp", "a", encoding="utf-8") as file:
+                file.write(text)
+
+    def _write_parquet(self, samples: list[Sample]) -> None:
+        """Write a batch to a Parquet file of its own."""
+        # Optional dependency, only imported when Parquet is selected
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        keys = sorted({key for _, values in samples for key in values})
+        columns = {
+            "time": pa.array(
+                [round(timestamp * 1000) for timestamp, _ in samples],
+                type=pa.timestamp("ms", tz="UTC"),
+            )
+        }
+        for key in keys:
+            columns[key] = pa.array(
+                [values.get(key) for _, values in samples], type=pa.float64()
+            )
+        table = pa.table(columns).replace_schema_metadata(self._tags)
+
+        first = datetime.fromtimestamp(samples[0][0], timezone.utc)
+        stem = f"{self._slug}-{first:%Y%m%dT%H%M%S}"
+        path = self.directory / f"{stem}.parquet"
+        count = 1
+        while path.exists():
+            # Batches starting within the same second
+            path = self.directory / f"{stem}-{count}.parquet"
+            count += 1
+        # Readers polling the directory never see a partial file
+        temporary = path.with_suffix(".parquet.tmp")
+        pq.write_table(table, temporary)
+        os.replace(temporary, path)
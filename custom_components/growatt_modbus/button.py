@@ -0,0 +1,57 @@
+"""Button platform for Growatt Modbus."""
+import logging
+
+from homeassistant.components.button import ButtonEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import CONF_MODEL, CONF_SERIAL, DOMAIN, MODEL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Growatt Modbus buttons."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+    async_add_entities([GrowattRefreshSettingsButton(coordinator, entry)])
+
+
+class GrowattRefreshSettingsButton(CoordinatorEntity, ButtonEntity):
+    """Button to read the inverter settings instead of using cached values."""
+
+    def __init__(self, coordinator, entry):
+        """Initialize the button."""
+        super().__init__(coordinator)
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_refresh_settings"
+        self._attr_name = f"{entry.data['name']} Refresh Settings"
+        self._attr_icon = "mdi:refresh"
+        self._attr_entity_category = EntityCategory.CONFIG
+
+    @property
+    def device_info(self):
+        """Return device information."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+            "name": self._entry.data["name"],
+            "manufacturer": "Growatt",
+            "model": self._entry.data.get(CONF_MODEL, MODEL),
+            "serial_number": self._entry.data.get(CONF_SERIAL),
+        }
+
+    @property
+    def available(self) -> bool:
+        """Return True while the inverter is reachable."""
+        return super().available and not self.coordinator.sleeping
+
+    async def async_press(self) -> None:
+        """Re-read the holding registers from the inverter."""
+        await self.coordinator.async_refresh_settings()
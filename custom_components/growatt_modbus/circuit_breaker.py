@@ -0,0 +1,70 @@
+"""Circuit breaker for unreachable Growatt inverters."""
+import time
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from .const import DEFAULT_BREAKER_BACKOFF, MAX_BREAKER_BACKOFF
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+
+
+class InverterOfflineError(ConnectionException):
+    """Raised without any I/O while the circuit breaker is open."""
+
+
+def is_connection_error(err: Exception) -> bool:
+    """Return True if an error means the inverter could not be reached."""
+    return isinstance(err, (ConnectionException, ModbusIOException, OSError))
+
+
+class CircuitBreaker:
+    """Stop talking to an inverter after it failed to answer.
+
+    The first connection failure opens the breaker. While it is open every
+    request fails immediately. Once the backoff has passed, the next request
+    is preceded by a single probe read; its outcome closes the breaker or
+    reopens it with twice the backoff.
+    """
+
+    def __init__(
+        self,
+        backoff: float = DEFAULT_BREAKER_BACKOFF,
+        max_backoff: float = MAX_BREAKER_BACKOFF,
+    ):
+        """Initialize the breaker."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._initial_backoff = backoff
+        self._max_backoff = max_backoff
+        self._backoff = backoff
+        self._retry_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until the next probe is allowed."""
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def check(self) -> bool:
+        """Raise while open, return True if the next request must be a probe."""
+        if self.state == STATE_CLOSED:
+            return False
+        if time.monotonic() < self._retry_at:
+            raise InverterOfflineError(
+                f"Inverter offline, retrying in {self.retry_in:.0f}s"
+            )
+        return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful request."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._backoff = self._initial_backoff
+
+    def record_failure(self) -> None:
+        """Open the breaker after a connection failure."""
+        self.failures += 1
+        if self.state == STATE_OPEN:
+            self._backoff = min(self._backoff * 2, self._max_backoff)
+        self.state = STATE_OPEN
+        self._retry_at = time.monotonic() + self._backoff
@@ -1,4 +1,5 @@
 """Config flow for Growatt Modbus integration."""
+import importlib.util
 import logging
 from typing import Any
 
@@ -8,19 +9,55 @@ from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, CONF_TIMEOUT
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import selector
 
 from .const import (
+    ARCHIVE_LINE_PROTOCOL,
+    ARCHIVE_NONE,
+    ARCHIVE_PARQUET,
+    CONF_ARCHIVE_BATCH,
+    CONF_ARCHIVE_FORMAT,
+    CONF_ARCHIVE_INTERVAL,
+    CONF_BAUDRATE,
+    CONF_CONTROL_INTERVAL,
+    CONF_EXPORT_ENTITY,
+    CONF_EXPORT_HYSTERESIS,
+    CONF_EXPORT_TARGET,
+    CONF_HISTORY_WINDOW,
+    CONF_PIPELINING,
+    CONF_LIMIT_STEP,
+    CONF_MODEL,
+    CONF_PROFILE,
+    CONF_RATED_POWER,
+    CONF_SERIAL,
     CONF_SLAVE,
+    CONF_TRANSPORT,
+    DEFAULT_ARCHIVE_BATCH,
+    DEFAULT_ARCHIVE_INTERVAL,
+    DEFAULT_BAUDRATE,
+    DEFAULT_CONTROL_INTERVAL,
+    DEFAULT_EXPORT_HYSTERESIS,
+    DEFAULT_EXPORT_TARGET,
+    DEFAULT_HISTORY_WINDOW,
+    DEFAULT_LIMIT_STEP,
     DEFAULT_PORT,
+    DEFAULT_PROFILE,
+    DEFAULT_RATED_POWER,
     DEFAULT_SLAVE,
     DEFAULT_TIMEOUT,
+    DEFAULT_TRANSPORT,
     DOMAIN,
-    MODEL,
+    TRANSPORT_RTU_OVER_TCP,
+    TRANSPORT_SERIAL,
+    TRANSPORT_TCP,
 )
-from .modbus_client import GrowattModbusClient
+from .modbus_client import AsyncGrowattModbusClient
+from .profiles import PROFILES, detect_profile, get_profile
 
 _LOGGER = logging.getLogger(__name__)
 
+PROFILE_AUTO = "auto"
+
 
 class GrowattModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Growatt Modbus."""
@@ -34,9 +71,9 @@ class GrowattModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
-            # Validate connection
+            # Validate connection and identify the inverter
             try:
-                await self._test_connection(user_input)
+                identity = await self._async_identify(user_input)
             except ConnectionError:
                 errors["base"] = "cannot_connect"
             except Exception:
@@ -51,13 +88,20 @@ class GrowattModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
                 return self.async_create_entry(
                     title=user_input[CONF_NAME],
-                    data=user_input,
+                    data={**user_input, **identity},
                 )
 
         # Show form
         data_schema = vol.Schema(
             {
                 vol.Required(CONF_NAME, default="Growatt Inverter"): str,
+                vol.Required(CONF_TRANSPORT, default=DEFAULT_TRANSPORT): vol.In(
+                    {
+                        TRANSPORT_TCP: "Modbus TCP",
+                        TRANSPORT_RTU_OVER_TCP: "Modbus RTU over TCP",
+                        TRANSPORT_SERIAL: "Modbus RTU serial port",
+                    }
+                ),
                 vol.Required(CONF_HOST): str,
                 vol.Required(CONF_PORT, default=DEFAULT_PORT): vol.All(
                     vol.Coerce(int), vol.Range(min=1, max=65535)
@@ -68,6 +112,15 @@ class GrowattModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(CONF_TIMEOUT, default=DEFAULT_TIMEOUT): vol.All(
                     vol.Coerce(int), vol.Range(min=1, max=30)
                 ),
+                vol.Optional(CONF_BAUDRATE, default=DEFAULT_BAUDRATE): vol.In(
+                    [2400, 4800, 9600, 19200, 38400, 57600, 115200]
+                ),
+                vol.Optional(CONF_PROFILE, default=PROFILE_AUTO): vol.In(
+                    {
+                        PROFILE_AUTO: "Detect automatically",
+                        **{key: profile.name for key, profile in PROFILES.items()},
+                    }
+                ),
             }
         )
 
@@ -77,26 +130,49 @@ class GrowattModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
-    async def _test_connection(self, user_input: dict[str, Any]) -> None:
-        """Test if we can connect to the inverter."""
-        client = GrowattModbusClient(
+    async def _async_identify(self, user_input: dict[str, Any]) -> dict[str, Any]:
+        """Connect to the inverter and return its model and serial number.
+
+        The identification registers are read once here and stored in the
+        config entry, so setting up the entry never repeats the detection.
+        """
+        client = AsyncGrowattModbusClient(
             host=user_input[CONF_HOST],
             port=user_input[CONF_PORT],
             slave=user_input[CONF_SLAVE],
             timeout=user_input.get(CONF_TIMEOUT, DEFAULT_TIMEOUT),
+            transport=user_input.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
+            baudrate=user_input.get(CONF_BAUDRATE, DEFAULT_BAUDRATE),
         )
 
         # Try to read status register
         try:
-            await self.hass.async_add_executor_job(
-                client.read_register, 0, 1, "input"
-            )
+            await client.read_register(0, 1, "input")
         except Exception as err:
+            await client.close()
             _LOGGER.error(f"Connection test failed: {err}")
             raise ConnectionError from err
+
+        serial = None
+        profile_key = user_input.get(CONF_PROFILE, PROFILE_AUTO)
+        try:
+            serial, device_type_code = await client.read_identity()
+        except Exception as err:
+            _LOGGER.warning(f"Could not read the inverter identification: {err}")
+            if profile_key == PROFILE_AUTO:
+                profile_key = DEFAULT_PROFILE
+        else:
+            if profile_key == PROFILE_AUTO:
+                profile_key = detect_profile(device_type_code).key
         finally:
             await client.close()
 
+        return {
+            CONF_PROFILE: profile_key,
+            CONF_MODEL: get_profile(profile_key).name,
+            CONF_SERIAL: serial or None,
+        }
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -116,6 +192,14 @@ class GrowattModbusOptionsFlow(config_entries.OptionsFlow):
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
+        options = self.config_entry.options
+        archive_formats = {
+            ARCHIVE_NONE: "Off",
+            ARCHIVE_LINE_PROTOCOL: "InfluxDB line protocol",
+        }
+        # Parquet needs pyarrow, which is not a requirement of the integration
+        if await self.hass.async_add_executor_job(importlib.util.find_spec, "pyarrow"):
+            archive_formats[ARCHIVE_PARQUET] = "Parquet"
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
@@ -126,6 +210,60 @@ class GrowattModbusOptionsFlow(config_entries.OptionsFlow):
                             CONF_TIMEOUT, DEFAULT_TIMEOUT
                         ),
                     ): int,
+                    vol.Optional(
+                        CONF_EXPORT_ENTITY,
+                        description={
+                            "suggested_value": options.get(CONF_EXPORT_ENTITY)
+                        },
+                    ): selector.EntitySelector(
+                        selector.EntitySelectorConfig(
+                            domain="sensor", device_class="power"
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_EXPORT_TARGET,
+                        default=options.get(CONF_EXPORT_TARGET, DEFAULT_EXPORT_TARGET),
+                    ): vol.Coerce(int),
+                    vol.Optional(
+                        CONF_EXPORT_HYSTERESIS,
+                        default=options.get(
+                            CONF_EXPORT_HYSTERESIS, DEFAULT_EXPORT_HYSTERESIS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_LIMIT_STEP,
+                        default=options.get(CONF_LIMIT_STEP, DEFAULT_LIMIT_STEP),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                    vol.Optional(
+                        CONF_CONTROL_INTERVAL,
+                        default=options.get(
+                            CONF_CONTROL_INTERVAL, DEFAULT_CONTROL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=60)),
+                    vol.Optional(
+                        CONF_RATED_POWER,
+                        default=options.get(CONF_RATED_POWER, DEFAULT_RATED_POWER),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        CONF_HISTORY_WINDOW,
+                        default=options.get(CONF_HISTORY_WINDOW, DEFAULT_HISTORY_WINDOW),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                    vol.Optional(
+                        CONF_PIPELINING,
+                        default=options.get(CONF_PIPELINING, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_ARCHIVE_FORMAT,
+                        default=options.get(CONF_ARCHIVE_FORMAT, ARCHIVE_NONE),
+                    ): vol.In(archive_formats),
+                    vol.Optional(
+                        CONF_ARCHIVE_INTERVAL,
+                        default=options.get(CONF_ARCHIVE_INTERVAL, DEFAULT_ARCHIVE_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                    vol.Optional(
+                        CONF_ARCHIVE_BATCH,
+                        default=options.get(CONF_ARCHIVE_BATCH, DEFAULT_ARCHIVE_BATCH),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100000)),
                 }
             ),
         )
\ No newline at end of file
@@ -0,0 +1,317 @@
+"""Shared Modbus connections for Growatt inverters."""
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from functools import partial
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from .const import (
+    DEFAULT_BAUDRATE,
+    DEFAULT_TRANSPORT,
+    MIN_REQUEST_TIMEOUT,
+    PIPELINE_DEPTH,
+    REQUEST_RETRIES,
+    TRANSPORT_SERIAL,
+)
+from .rtt import RttEstimator
+from .transport import Transport, create_transport
+
+_LOGGER = logging.getLogger(__name__)
+
+# Queue priorities, lower runs first
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+
+_TIMED_OUT = object()
+
+
+class SharedConnection:
+    """A Modbus connection shared by all slaves behind one gateway or port.
+
+    A single worker task owns the socket and runs queued requests one at a
+    time. Writes are queued ahead of reads, so a control command waits for
+    at most the request in flight instead of the rest of a poll. Requests of
+    the same priority run in arrival order, so the block reads of inverters
+    polling at the same time interleave fairly instead of one poll
+    monopolizing the socket.
+
+    Requests time out after the retransmission timeout of an RttEstimator
+    instead of the configured timeout, which only caps it. A request that
+    times out below the cap is retried right away with twice the timeout,
+    so a lost frame on a fast link costs a few hundred milliseconds.
+
+    With a pipelined transport, up to PIPELINE_DEPTH requests are sent
+    without waiting for earlier responses, in the same priority order.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: int,
+        transport: str = DEFAULT_TRANSPORT,
+        baudrate: int = DEFAULT_BAUDRATE,
+        pipelining: bool = False,
+    ):
+        """Initialize the connection."""
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.transport = transport
+        self.pipelining = pipelining
+        self.users = 0
+        self.sleeping = 0
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self.rtt = RttEstimator(MIN_REQUEST_TIMEOUT, timeout)
+        self._transport: Transport = create_transport(
+            transport, host, port, timeout, baudrate, pipelining
+        )
+        self._slots = asyncio.Semaphore(PIPELINE_DEPTH)
+        self._exclusive = asyncio.Lock()
+        self._in_flight: set[asyncio.Task] = set()
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the socket is open."""
+        return self._transport.connected
+
+    @property
+    def frame_overhead(self) -> int:
+        """Return the bytes the transport's framing adds to each PDU."""
+        return self._transport.frame_overhead
+
+    @property
+    def pipelined(self) -> bool:
+        """Return True if requests are sent without waiting for responses.
+
+        Requests run in lock-step until a round trip has been measured, so
+        lost pipelined requests are retried after a short timeout.
+        """
+        return self._transport.pipelined and self.rtt.samples > 0
+
+    async def _connect(self) -> None:
+        """Connect to the gateway if needed, only called by the worker."""
+        if not self._transport.connected:
+            await self._transport.connect()
+
+    async def _run(self) -> None:
+        """Execute queued requests, one at a time unless pipelining."""
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, request, future = await self._queue.get()
+            if future.done():
+                # The caller gave up while the request was queued
+                continue
+            try:
+                await self._connect()
+                if not self.pipelined:
+                    await self._complete(request, future)
+                    continue
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_exception(ConnectionException("Connection closed"))
+                raise
+            except Exception as err:  # noqa: BLE001 - handed to the caller
+                if not future.done():
+                    future.set_exception(err)
+                continue
+
+            task = loop.create_task(self._complete(request, future))
+            self._in_flight.add(task)
+            task.add_done_callback(self._pipelined_done)
+
+    def _pipelined_done(self, task: asyncio.Task) -> None:
+        """Free the slot of a finished pipelined request."""
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _complete(self, request: Callable[[], Awaitable], future: asyncio.Future) -> None:
+        """Execute a request and hand its outcome to the caller."""
+        try:
+            result = await self._execute(request)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.set_exception(ConnectionException("Connection closed"))
+            raise
+        except Exception as err:  # noqa: BLE001 - handed to the caller
+            if not future.done():
+                future.set_exception(err)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    @asynccontextmanager
+    async def _turn(self) -> AsyncIterator[bool]:
+        """Wait until an attempt may go on the wire, yield if it is pipelined.
+
+        Pipelined attempts go right away. Otherwise they take turns, which
+        also holds back the retries of pipelined requests still in flight
+        after pipelining was given up.
+        """
+        if self.pipelined:
+            yield True
+            return
+        async with self._exclusive:
+            yield False
+
+    async def _execute(self, request: Callable[[], Awaitable]):
+        """Run a request under the adaptive timeout, retrying lost ones."""
+        rtt = self.rtt
+        retries = 0
+        resent = False
+        while True:
+            async with self._turn() as pipelined:
+                timeout = rtt.rto
+                started = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(request(), timeout)
+                except asyncio.TimeoutError:
+                    result = _TIMED_OUT
+
+            if result is not _TIMED_OUT:
+                if not resent:
+                    rtt.sample(time.monotonic() - started)
+                return result
+
+            resent = True
+            if pipelined and not self.pipelined:
+                # Lost to a gateway that cannot pipeline, not to the link
+                continue
+            rtt.backoff(timeout)
+            # Waiting any longer than the configured timeout is pointless
+            if timeout >= rtt.ceiling or retries == REQUEST_RETRIES:
+                raise ModbusIOException(
+                    f"No response from {self.host} within {timeout:.2f}s"
+                )
+            retries += 1
+            _LOGGER.debug(
+                f"No response from {self.host} within {timeout * 1000:.0f} ms, retrying"
+            )
+
+    async def _submit(self, priority: int, request: Callable[[], Awaitable]):
+        """Queue a request for the worker and wait for its response."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((priority, next(self._sequence), request, future))
+        return await future
+
+    async def read_registers(
+        self, register_type: str, address: int, count: int, slave: int
+    ) -> list[int]:
+        """Read a span of input or holding registers from a slave."""
+        return await self._submit(
+            PRIORITY_READ,
+            partial(self._transport.read_registers, register_type, address, count, slave),
+        )
+
+    async def write_register(self, address: int, value: int, slave: int) -> bool:
+        """Write a single holding register of a slave."""
+        return await self._submit(
+            PRIORITY_WRITE,
+            partial(self._transport.write_register, address, value, slave),
+        )
+
+    async def write_registers(self, address: int, values: list[int], slave: int) -> bool:
+        """Write consecutive holding registers of a slave in one request."""
+        return await self._submit(
+            PRIORITY_WRITE,
+            partial(self._transport.write_registers, address, values, slave),
+        )
+
+    def close(self) -> None:
+        """Close the socket."""
+        self._transport.close()
+
+    def shutdown(self) -> None:
+        """Stop the worker, failing queued requests, and close the socket."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for task in self._in_flight:
+            task.cancel()
+        while not self._queue.empty():
+            *_, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(ConnectionException("Connection closed"))
+        self.close()
+
+    def suspend(self) -> None:
+        """Mark a user as asleep, closing the socket once all users are."""
+        self.sleeping += 1
+        if self.sleeping >= self.users:
+            self.close()
+
+    def resume(self) -> None:
+        """Mark a sleeping user as awake, the socket reopens on demand."""
+        self.sleeping = max(0, self.sleeping - 1)
+
+
+_CONNECTIONS: dict[tuple[str, int | None], SharedConnection] = {}
+
+
+def _connection_key(host: str, port: int, transport: str) -> tuple[str, int | None]:
+    """Return the registry key of a connection, a serial port has no port."""
+    if transport == TRANSPORT_SERIAL:
+        return host, None
+    return host, port
+
+
+def acquire_connection(
+    host: str,
+    port: int,
+    timeout: int,
+    transport: str = DEFAULT_TRANSPORT,
+    baudrate: int = DEFAULT_BAUDRATE,
+    pipelining: bool = False,
+) -> SharedConnection:
+    """Return the shared connection for a gateway, creating it if needed.
+
+    The settings of the first user apply to everyone sharing the connection.
+    """
+    key = _connection_key(host, port, transport)
+    connection = _CONNECTIONS.get(key)
+    if connection is None:
+        connection = SharedConnection(
+            host, port, timeout, transport, baudrate, pipelining
+        )
+        _CONNECTIONS[key] = connection
+    elif transport != connection.transport:
+        _LOGGER.warning(
+            f"Reusing {connection.transport} connection to {host}:{port} "
+            f"instead of {transport}"
+        )
+    elif pipelining != connection.pipelining:
+        _LOGGER.warning(
+            f"Reusing connection to {host}:{port} with pipelining "
+            f"{'on' if connection.pipelining else 'off'}, reload every inverter "
+            f"behind it to change it"
+        )
+    elif timeout != connection.timeout:
+        _LOGGER.debug(
+            f"Reusing connection to {host}:{port} with timeout "
+            f"{connection.timeout}s instead of {timeout}s"
+        )
+
+    connection.users += 1
+    return connection
+
+
+def release_connection(connection: SharedConnection) -> None:
+    """Release a shared connection, closing it when the last user is gone."""
+    connection.users -= 1
+    if connection.users > 0:
+        return
+
+    connection.shutdown()
+    key = _connection_key(connection.host, connection.port, connection.transport)
+    if _CONNECTIONS.get(key) is connection:
+        del _CONNECTIONS[key]
@@ -1,53 +1,134 @@
 """Constants for Growatt Modbus integration."""
+from datetime import timedelta
 
 DOMAIN = "growatt_modbus"
 
 # Configuration
 CONF_SLAVE = "slave"
 CONF_INVERTER_NAME = "name"
+CONF_PROFILE = "profile"
+CONF_MODEL = "model"
+CONF_SERIAL = "serial"
+CONF_TRANSPORT = "transport"
+CONF_BAUDRATE = "baudrate"
+
+# Transports, for serial ports the host is the device path
+TRANSPORT_TCP = "tcp"
+TRANSPORT_RTU_OVER_TCP = "rtu_over_tcp"
+TRANSPORT_SERIAL = "serial"
+
+# Export limiting options
+CONF_EXPORT_ENTITY = "export_entity"
+CONF_EXPORT_TARGET = "export_target"
+CONF_EXPORT_HYSTERESIS = "export_hysteresis"
+CONF_LIMIT_STEP = "limit_step"
+CONF_CONTROL_INTERVAL = "control_interval"
+CONF_RATED_POWER = "rated_power"
+
+# Rolling statistics option, in minutes
+CONF_HISTORY_WINDOW = "history_window"
+
+# Send the block reads of a poll without waiting for each response
+CONF_PIPELINING = "pipelining"
+
+# Time-series archive of every poll, written in batches to files in
+# ARCHIVE_DIR under the configuration directory
+CONF_ARCHIVE_FORMAT = "archive_format"
+CONF_ARCHIVE_INTERVAL = "archive_interval"
+CONF_ARCHIVE_BATCH = "archive_batch"
+ARCHIVE_NONE = "none"
+ARCHIVE_LINE_PROTOCOL = "line_protocol"
+ARCHIVE_PARQUET = "parquet"
+ARCHIVE_DIR = "growatt_archive"
+ARCHIVE_MEASUREMENT = "growatt"
 
 # Default values
 DEFAULT_PORT = 502
 DEFAULT_SLAVE = 1
 DEFAULT_TIMEOUT = 5
 DEFAULT_SCAN_INTERVAL = 5
+DEFAULT_PROFILE = "min"
+DEFAULT_TRANSPORT = TRANSPORT_TCP
+DEFAULT_BAUDRATE = 9600
+DEFAULT_EXPORT_TARGET = 0  # W
+DEFAULT_EXPORT_HYSTERESIS = 100  # W
+DEFAULT_LIMIT_STEP = 20  # % per adjustment
+DEFAULT_CONTROL_INTERVAL = 2  # seconds between adjustments
+DEFAULT_RATED_POWER = 5000  # W
+DEFAULT_HISTORY_WINDOW = 60  # minutes
+STATISTICS_REFRESH_INTERVAL = 300  # seconds between min/max/mean updates
+DEFAULT_ARCHIVE_INTERVAL = 60  # seconds between archive writes
+DEFAULT_ARCHIVE_BATCH = 1000  # samples written at once at the latest
 
-# Modbus register addresses
-REGISTERS = {
-    # Status
-    "status": {"address": 0, "type": "input", "data_type": "uint16"},
-    
-    # PV Strings
-    "pv1_voltage": {"address": 3, "type": "input", "data_type": "uint16", "scale": 0.1},
-    "pv1_current": {"address": 4, "type": "input", "data_type": "uint16", "scale": 0.1},
-    "pv2_voltage": {"address": 7, "type": "input", "data_type": "uint16", "scale": 0.1},
-    "pv2_current": {"address": 8, "type": "input", "data_type": "uint16", "scale": 0.1},
-    
-    # AC Output
-    "ac_frequency": {"address": 37, "type": "input", "data_type": "uint16", "scale": 0.01},
-    "ac_power": {"address": 36, "type": "input", "data_type": "uint16", "scale": 0.1},
-    "ac_voltage": {"address": 38, "type": "input", "data_type": "uint16", "scale": 0.1},
-    "ac_current": {"address": 39, "type": "input", "data_type": "uint16", "scale": 0.1},
-    
-    # Energy
-    "today_energy": {"address": 53, "type": "input", "data_type": "uint32", "scale": 0.1},
-    "total_energy": {"address": 91, "type": "input", "data_type": "uint32", "scale": 0.1},
-    
-    # Temperature
-    "temperature": {"address": 93, "type": "input", "data_type": "uint16", "scale": 0.1},
-    
-    # Control
-    "cmd_memory": {"address": 2, "type": "holding", "data_type": "uint16"},
-    "power_limit": {"address": 3, "type": "holding", "data_type": "uint16"},
-    "inverter_enable": {"address": 0, "type": "holding", "data_type": "uint16"},
-}
+# Poll intervals (seconds) for register groups
+SCAN_INTERVAL_FAST = 2
+SCAN_INTERVAL_SLOW = 30
+DEFAULT_STREAM_INTERVAL = 1  # seconds between streamed reads
+
+# Holding registers only change when written; cached values are served
+# from memory and re-read from the inverter after this many seconds
+HOLDING_CACHE_TTL = 3600
+
+# Read planning
+# Registers of the same type closer than DEFAULT_MAX_GAP are fetched in one
+# request; the Modbus specification caps a single read at 125 registers.
+DEFAULT_MAX_GAP = 10
+MAX_REGISTERS_PER_READ = 125
+
+# Values the export limit controller reads without a sensor of their own
+CONTROL_KEYS = frozenset({"power_limit"})
+
+# Identification holding registers: the serial number is 10 ASCII characters
+# in registers 23-27, the device type code identifies the inverter family
+SERIAL_REGISTER = 23
+SERIAL_REGISTER_COUNT = 5
+DEVICE_TYPE_REGISTER = 43
+
+# Request timeouts adapt to the measured round-trip time, between this
+# floor (seconds) and the configured timeout. Requests that time out
+# below the configured timeout are retried up to REQUEST_RETRIES times.
+MIN_REQUEST_TIMEOUT = 0.2
+REQUEST_RETRIES = 2
+
+# Requests in flight at once on connections with pipelining enabled
+PIPELINE_DEPTH = 8
+
+# Circuit breaker backoff (seconds) after the inverter stopped answering
+DEFAULT_BREAKER_BACKOFF = 10
+MAX_BREAKER_BACKOFF = 300
+
+# Power limit writes are coalesced for this long (seconds) before sending,
+# but never held back longer than MAX_WRITE_DELAY
+DEFAULT_WRITE_DELAY = 0.5
+MAX_WRITE_DELAY = 2.0
+
+# Number of recent polls used for latency percentiles
+DEFAULT_STATS_WINDOW = 100
+
+# Last good snapshot kept in Home Assistant storage, so entities come up
+# with it right away on restart. Written at most every SNAPSHOT_SAVE_DELAY
+# seconds and when Home Assistant stops.
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 300
+
+# Entries whose first live poll runs at the same time after a restart
+STARTUP_REFRESH_CONCURRENCY = 2
+DATA_STARTUP_SLOTS = f"{DOMAIN}_startup_slots"
+
+# Service returning the rolling statistics of an inverter's registers
+SERVICE_GET_STATISTICS = "get_statistics"
+ATTR_KEYS = "keys"
+
+# Polling pauses overnight and resumes this long before sunrise
+SLEEP_WAKE_MARGIN = timedelta(minutes=30)
 
 # Status codes
+STATUS_STANDBY = 0
 STATUS_CODES = {
     0: "Standby",
     1: "Normal",
     3: "Fault",
 }
 
-# Inverter model
+# Model shown for entries set up before the model was detected
 MODEL = "MIN5000TL-X"
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""Closed-loop export limiting for Growatt inverters."""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from pymodbus.exceptions import ModbusException
+
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    UnitOfPower,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+
+from .const import (
+    CONF_CONTROL_INTERVAL,
+    CONF_EXPORT_ENTITY,
+    CONF_EXPORT_HYSTERESIS,
+    CONF_EXPORT_TARGET,
+    CONF_LIMIT_STEP,
+    CONF_RATED_POWER,
+    DEFAULT_CONTROL_INTERVAL,
+    DEFAULT_EXPORT_HYSTERESIS,
+    DEFAULT_EXPORT_TARGET,
+    DEFAULT_LIMIT_STEP,
+    DEFAULT_RATED_POWER,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+FULL_POWER = 100
+
+
+@dataclass
+class ControlState:
+    """Curtailment settings shared by the switch, the number and the controller."""
+
+    curtailment: bool = False
+    # Limit set by the user, the ceiling while export limiting is active
+    power_limit: int = FULL_POWER
+    # Last limit written to the inverter
+    applied_limit: int | None = None
+    # Last grid export reading in W
+    export_power: float | None = None
+
+
+class ExportLimitController:
+    """Apply curtailment, keeping grid export at a target if configured.
+
+    Without an export entity, curtailment writes the user's power limit as
+    is. With one, every export reading moves the limit towards the output
+    that brings export to the target: readings within the hysteresis are
+    ignored, one adjustment moves the limit by at most ``step`` percent and
+    adjustments are at least ``interval`` seconds apart. The limit is only
+    lowered while exporting too much and only raised while exporting too
+    little, never above the user's power limit, and a limit equal to the
+    one last written is not sent again.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, options: dict[str, Any]):
+        """Initialize the controller."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.state: ControlState = coordinator.control
+        self.export_entity: str | None = options.get(CONF_EXPORT_ENTITY) or None
+        self.target = options.get(CONF_EXPORT_TARGET, DEFAULT_EXPORT_TARGET)
+        self.hysteresis = options.get(CONF_EXPORT_HYSTERESIS, DEFAULT_EXPORT_HYSTERESIS)
+        self.step = options.get(CONF_LIMIT_STEP, DEFAULT_LIMIT_STEP)
+        self.interval = options.get(CONF_CONTROL_INTERVAL, DEFAULT_CONTROL_INTERVAL)
+        self.rated_power = options.get(CONF_RATED_POWER, DEFAULT_RATED_POWER)
+        self._last_adjustment = 0.0
+        self._unsub_state: CALLBACK_TYPE | None = None
+        self._unsub_retry: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Follow the export entity."""
+        if self.export_entity is not None:
+            self._unsub_state = async_track_state_change_event(
+                self.hass, [self.export_entity], self._async_export_changed
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following the export entity."""
+        if self._unsub_state is not None:
+            self._unsub_state()
+            self._unsub_state = None
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
+
+    async def async_apply(self) -> None:
+        """Apply the control state after the user changed it."""
+        if not self.state.curtailment:
+            await self._async_set_limit(FULL_POWER)
+        elif self.export_entity is None:
+            await self._async_set_limit(self.state.power_limit)
+        else:
+            # Clamp to the new ceiling right away, then regulate from there
+            current = min(self._current_limit(), self.state.power_limit)
+            await self._async_set_limit(current)
+            self._last_adjustment = 0.0
+            await self._async_regulate()
+
+    @callback
+    def _async_export_changed(self, event: Event) -> None:
+        """Regulate on a new export reading."""
+        if self.state.curtailment and self._unsub_retry is None:
+            self.hass.async_create_task(self._async_regulate_safely())
+
+    async def _async_retry(self, _now) -> None:
+        """Regulate once the rate limit allows it."""
+        self._unsub_retry = None
+        await self._async_regulate_safely()
+
+    async def _async_regulate_safely(self) -> None:
+        """Regulate, logging instead of raising communication errors."""
+        try:
+            await self._async_regulate()
+        except ModbusException as err:
+            _LOGGER.debug(f"Export limiting skipped an adjustment: {err}")
+
+    async def _async_regulate(self) -> None:
+        """Move the power limit towards the export target."""
+        if not self.state.curtailment or self.coordinator.sleeping:
+            return
+
+        wait = self._last_adjustment + self.interval - time.monotonic()
+        if wait > 0:
+            if self._unsub_retry is None:
+                self._unsub_retry = async_call_later(self.hass, wait, self._async_retry)
+            return
+
+        export = self._read_export()
+        self.state.export_power = export
+        # Hold the current limit while the meter is unavailable
+        if export is None:
+            return
+        error = export - self.target
+        if abs(error) <= self.hysteresis:
+            return
+
+        current = self._current_limit()
+        output = (self.coordinator.data or {}).get("ac_power")
+        if output is None:
+            output = current * self.rated_power / FULL_POWER
+        wanted = round((output - error) * FULL_POWER / self.rated_power)
+
+        if error > 0:
+            limit = max(wanted, current - self.step)
+            limit = min(limit, current)
+        else:
+            limit = min(wanted, current + self.step)
+            limit = max(limit, current)
+        limit = max(0, min(limit, self.state.power_limit))
+
+        self._last_adjustment = time.monotonic()
+        await self._async_set_limit(limit)
+
+    def _current_limit(self) -> int:
+        """Return the limit the inverter currently runs at."""
+        if self.state.applied_limit is not None:
+            return self.state.applied_limit
+        limit = (self.coordinator.data or {}).get("power_limit")
+        return int(limit) if limit is not None else self.state.power_limit
+
+    def _read_export(self) -> float | None:
+        """Return the grid export in W, None if unknown."""
+        state = self.hass.states.get(self.export_entity)
+        if state is None or state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+            return None
+        try:
+            value = float(state.state)
+        except ValueError:
+            return None
+        if state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) == UnitOfPower.KILO_WATT:
+            value *= 1000
+        return value
+
+    async def _async_set_limit(self, limit: int) -> None:
+        """Write a power limit unless the inverter already runs at it."""
+        if limit == self.state.applied_limit:
+            return
+        _LOGGER.debug(f"Setting power limit to {limit}%")
+        if await self.coordinator.client.set_power_limit(limit):
+            self.state.applied_limit = limit
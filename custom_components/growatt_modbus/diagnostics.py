@@ -0,0 +1,31 @@
+"""Diagnostics support for Growatt Modbus."""
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_SERIAL, DOMAIN
+
+# The unique ID is built from the host and slave address
+TO_REDACT = {CONF_HOST, CONF_SERIAL, "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    client = coordinator.client
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "read_plan": [asdict(decoder.block) for decoder in client.decode_plan],
+        "statistics": client.stats.as_dict(),
+        "round_trip": client.round_trip,
+        "data": coordinator.data,
+    }
@@ -0,0 +1,45 @@
+"""Write-through cache for Growatt holding registers."""
+import time
+
+from .const import HOLDING_CACHE_TTL
+
+
+class HoldingCache:
+    """Last known values of the inverter's holding registers.
+
+    Holding registers only change when they are written, so every
+    successful read or write stores the values and later polls are served
+    from memory. A register is read from the inverter again once its value
+    is older than ``ttl`` or after invalidate().
+    """
+
+    def __init__(self, ttl: float = HOLDING_CACHE_TTL):
+        """Initialize an empty cache."""
+        self.ttl = ttl
+        self.values: dict[int, int] = {}
+        self._stored_at: dict[int, float] = {}
+
+    def store(self, address: int, values: list[int]) -> None:
+        """Remember values read from or written to consecutive registers."""
+        now = time.monotonic()
+        for offset, value in enumerate(values):
+            self.values[address + offset] = value
+            self._stored_at[address + offset] = now
+
+    def get(self, address: int, count: int) -> list[int] | None:
+        """Return a span of registers, or None if any of them is stale."""
+        expired = time.monotonic() - self.ttl
+        span = range(address, address + count)
+        if any(self._stored_at.get(reg, expired) <= expired for reg in span):
+            return None
+        return [self.values[reg] for reg in span]
+
+    def invalidate(self, address: int | None = None, count: int = 1) -> None:
+        """Forget a span of registers, or all of them."""
+        if address is None:
+            self.values.clear()
+            self._stored_at.clear()
+            return
+        for reg in range(address, address + count):
+            self.values.pop(reg, None)
+            self._stored_at.pop(reg, None)
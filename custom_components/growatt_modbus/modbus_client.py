@@ -1,25 +1,181 @@
 """Modbus client for Growatt inverters."""
+import asyncio
 import logging
-import struct
+import time
+from collections.abc import AsyncIterator, Iterable
 from typing import Any
 
 from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ModbusException
+from pymodbus.exceptions import ConnectionException, ModbusException
 
-from .const import REGISTERS
+from .circuit_breaker import STATE_CLOSED, CircuitBreaker, is_connection_error
+from .connection import SharedConnection, acquire_connection, release_connection
+from .const import (
+    DEFAULT_BAUDRATE,
+    DEFAULT_MAX_GAP,
+    DEFAULT_PROFILE,
+    DEFAULT_STREAM_INTERVAL,
+    DEFAULT_TRANSPORT,
+    DEVICE_TYPE_REGISTER,
+    SERIAL_REGISTER,
+    SERIAL_REGISTER_COUNT,
+)
+from .holding_cache import HoldingCache
+from .profiles import get_decode_plan, get_profile, get_stream_plan
+from .read_plan import BlockDecoder, ReadBlock
+from .stats import PollStatistics
+from .write_queue import WriteQueue
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class GrowattModbusClient:
-    """Growatt Modbus TCP client."""
+class _GrowattModbusClientBase:
+    """Transport independent parts of the Growatt clients."""
 
-    def __init__(self, host: str, port: int, slave: int, timeout: int = 5):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        slave: int,
+        timeout: int = 5,
+        max_gap: int = DEFAULT_MAX_GAP,
+        profile: str = DEFAULT_PROFILE,
+    ):
         """Initialize the Modbus client."""
         self.host = host
         self.port = port
         self.slave = slave
         self.timeout = timeout
+        self.profile = get_profile(profile)
+        self.registers = self.profile.registers
+        # Cheap read used to check whether an offline inverter is back
+        self._probe = self.registers["status"]
+        self._pv_strings = [
+            n for n in range(1, 5)
+            if f"pv{n}_voltage" in self.registers and f"pv{n}_current" in self.registers
+        ]
+        self._max_gap = max_gap
+        self._decode_plan = get_decode_plan(profile, max_gap)
+        self.stats = PollStatistics()
+        self.breaker = CircuitBreaker()
+        self.holding = HoldingCache()
+
+    @property
+    def decode_plan(self) -> tuple[BlockDecoder, ...]:
+        """Return the compiled block reads of the polled registers."""
+        return self._decode_plan
+
+    @staticmethod
+    def _check_limit(limit_percent: int) -> None:
+        """Validate a power limit value."""
+        if not 0 <= limit_percent <= 100:
+            raise ValueError("Power limit must be between 0 and 100")
+
+    def _request_failed(self, err: Exception) -> None:
+        """Open the circuit breaker if a request could not reach the inverter."""
+        if is_connection_error(err):
+            self.breaker.record_failure()
+
+    def _read_succeeded(self, address: int, register_type: str, registers: list[int]) -> None:
+        """Close the breaker and cache holding register values."""
+        self.breaker.record_success()
+        if register_type == "holding":
+            self.holding.store(address, registers)
+
+    def _write_done(
+        self, address: int, values: list[int], success: bool, latency: float
+    ) -> None:
+        """Record a completed write and update the cache with its values."""
+        self.breaker.record_success()
+        self.stats.record_write_latency(latency)
+        if success:
+            self.holding.store(address, values)
+        else:
+            self.holding.invalidate(address, len(values))
+
+    def _read_cached(self, decoder: BlockDecoder, data: dict[str, Any]) -> bool:
+        """Decode a holding block from the cache, False if it must be read."""
+        block = decoder.block
+        if block.register_type != "holding":
+            return False
+        registers = self.holding.get(block.address, block.count)
+        if registers is None:
+            return False
+        decoder.decode_registers(registers, data)
+        return True
+
+    def _block_failed(self, block: ReadBlock, data: dict[str, Any], err: Exception) -> None:
+        """Mark all values of a block as unavailable."""
+        self.stats.record_error(block.keys)
+        _LOGGER.warning(
+            f"Failed to read {block.register_type} registers "
+            f"{block.address}-{block.address + block.count - 1}: {err}"
+        )
+        for key in block.keys:
+            data[key] = None
+
+    @property
+    def keys(self) -> frozenset[str]:
+        """Return the keys of all values the client provides."""
+        return frozenset(self.registers) | {"pv_power"}
+
+    def add_derived_values(self, data: dict[str, Any]) -> None:
+        """Add values calculated from the raw registers."""
+        # Calculate PV power over all strings of the model
+        strings = [
+            (data.get(f"pv{n}_voltage"), data.get(f"pv{n}_current"))
+            for n in self._pv_strings
+        ]
+        if strings and all(v is not None and i is not None for v, i in strings):
+            data["pv_power"] = sum(v * i for v, i in strings)
+        else:
+            data["pv_power"] = None
+
+    def register_keys(self, keys: Iterable[str]) -> frozenset[str]:
+        """Return the registers the values of keys are decoded from."""
+        keys = set(keys)
+        unknown = keys - self.keys
+        if unknown:
+            raise ValueError(f"Unknown keys: {', '.join(sorted(unknown))}")
+        if "pv_power" in keys:
+            keys.discard("pv_power")
+            for n in self._pv_strings:
+                keys.update((f"pv{n}_voltage", f"pv{n}_current"))
+        return frozenset(keys)
+
+    def select(self, keys: Iterable[str] | None = None) -> None:
+        """Poll only the registers behind keys, all registers if None."""
+        registers = None if keys is None else self.register_keys(keys)
+        self._decode_plan = get_decode_plan(self.profile.key, self._max_gap, registers)
+
+    def stream_plan(self, keys: Iterable[str]) -> tuple[BlockDecoder, ...]:
+        """Return the block reads covering only the given keys."""
+        return get_stream_plan(self.profile.key, self.register_keys(keys), self._max_gap)
+
+    @staticmethod
+    def parse_identity(registers: list[int]) -> tuple[str, int]:
+        """Return serial number and device type code from registers 23-43."""
+        raw = b"".join(
+            value.to_bytes(2, "big") for value in registers[:SERIAL_REGISTER_COUNT]
+        )
+        serial = raw.decode("ascii", errors="ignore").strip("\x00 ")
+        return serial, registers[DEVICE_TYPE_REGISTER - SERIAL_REGISTER]
+
+
+class GrowattModbusClient(_GrowattModbusClientBase):
+    """Growatt Modbus TCP client."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        slave: int,
+        timeout: int = 5,
+        max_gap: int = DEFAULT_MAX_GAP,
+        profile: str = DEFAULT_PROFILE,
+    ):
+        """Initialize the Modbus client."""
+        super().__init__(host, port, slave, timeout, max_gap, profile)
         self._client = ModbusTcpClient(
             host=host,
             port=port,
@@ -39,100 +195,358 @@ class GrowattModbusClient:
 
     def read_register(self, address: int, count: int = 1, register_type: str = "input") -> list:
         """Read from a Modbus register."""
-        if not self.connect():
-            raise ModbusException("Failed to connect to inverter")
+        self.breaker.check()
 
         try:
+            if not self.connect():
+                raise ConnectionException("Failed to connect to inverter")
+
+            self.stats.record_read(count)
             if register_type == "input":
-                result = self._client.read_input_registers(address, count, slave=self.slave)
+                result = self._client.read_input_registers(
+                    address, count=count, device_id=self.slave
+                )
             else:  # holding
-                result = self._client.read_holding_registers(address, count, slave=self.slave)
+                result = self._client.read_holding_registers(
+                    address, count=count, device_id=self.slave
+                )
 
             if result.isError():
                 raise ModbusException(f"Error reading register {address}")
-
-            return result.registers
         except Exception as e:
+            self._request_failed(e)
             _LOGGER.error(f"Error reading register {address}: {e}")
             raise
 
+        self._read_succeeded(address, register_type, result.registers)
+        return result.registers
+
     def write_register(self, address: int, value: int, register_type: str = "holding") -> bool:
         """Write to a Modbus register."""
-        if not self.connect():
-            raise ModbusException("Failed to connect to inverter")
+        if register_type != "holding":
+            raise ValueError("Can only write to holding registers")
+        self.breaker.check()
 
         try:
-            if register_type == "holding":
-                result = self._client.write_register(address, value, slave=self.slave)
-                return not result.isError()
-            else:
-                raise ValueError("Can only write to holding registers")
+            if not self.connect():
+                raise ConnectionException("Failed to connect to inverter")
+
+            self.stats.record_write()
+            started = time.monotonic()
+            result = self._client.write_register(
+                address, value, device_id=self.slave
+            )
         except Exception as e:
+            self._request_failed(e)
             _LOGGER.error(f"Error writing register {address}: {e}")
             raise
 
+        success = not result.isError()
+        self._write_done(address, [value], success, time.monotonic() - started)
+        return success
+
+    def read_block(self, decoder: BlockDecoder, data: dict[str, Any]) -> bool:
+        """Read one block and decode its values into data.
+
+        Holding blocks are served from the cache while it is fresh. Returns
+        False if the inverter rejected the request. Connection failures are
+        raised so the caller aborts the poll.
+        """
+        if self._read_cached(decoder, data):
+            return True
+        block = decoder.block
+        if self.breaker.check():
+            # First request after an outage, probe with a single register
+            self.read_register(self._probe["address"], 1, self._probe["type"])
+
+        try:
+            registers = self.read_register(
+                block.address, block.count, block.register_type
+            )
+            decoder.decode_registers(registers, data)
+        except Exception as e:
+            if is_connection_error(e):
+                self.stats.record_error(block.keys)
+                raise
+            self._block_failed(block, data, e)
+            return False
+        return True
+
     def read_all_data(self) -> dict[str, Any]:
-        """Read all data from the inverter."""
+        """Read all data from the inverter.
+
+        Raises ConnectionException if the inverter cannot be reached.
+        """
         data = {}
-        
-        for key, reg_info in REGISTERS.items():
-            try:
-                address = reg_info["address"]
-                reg_type = reg_info["type"]
-                data_type = reg_info["data_type"]
-                
-                # Determine count based on data type
-                count = 2 if data_type == "uint32" else 1
-                
-                # Read register
-                registers = self.read_register(address, count, reg_type)
-                
-                # Parse value
-                if data_type == "uint16":
-                    value = registers[0]
-                elif data_type == "uint32":
-                    # Combine two registers for 32-bit value
-                    value = (registers[0] << 16) | registers[1]
-                else:
-                    value = registers[0]
-                
-                # Apply scaling if present
-                if "scale" in reg_info:
-                    value = value * reg_info["scale"]
-                
-                data[key] = value
-                
-            except Exception as e:
-                _LOGGER.warning(f"Failed to read {key}: {e}")
-                data[key] = None
-        
-        # Calculate PV power
-        if all(data.get(k) is not None for k in ["pv1_voltage", "pv1_current", "pv2_voltage", "pv2_current"]):
-            data["pv_power"] = (
-                data["pv1_voltage"] * data["pv1_current"] +
-                data["pv2_voltage"] * data["pv2_current"]
-            )
-        else:
-            data["pv_power"] = None
-        
+
+        for decoder in self._decode_plan:
+            self.read_block(decoder, data)
+
+        self.add_derived_values(data)
         return data
 
     def enable_cmd_memory(self) -> bool:
         """Enable command memory mode."""
-        return self.write_register(REGISTERS["cmd_memory"]["address"], 1)
+        return self.write_register(self.registers["cmd_memory"]["address"], 1)
 
     def set_power_limit(self, limit_percent: int) -> bool:
         """Set power limit (0-100%)."""
-        if not 0 <= limit_percent <= 100:
-            raise ValueError("Power limit must be between 0 and 100")
-        
+        self._check_limit(limit_percent)
+
         # Enable command memory first
         self.enable_cmd_memory()
-        
+
         # Set power limit
-        return self.write_register(REGISTERS["power_limit"]["address"], limit_percent)
+        return self.write_register(self.registers["power_limit"]["address"], limit_percent)
 
     def set_inverter_enable(self, enable: bool) -> bool:
         """Enable or disable the inverter."""
         value = 1 if enable else 0
-        return self.write_register(REGISTERS["inverter_enable"]["address"], value)
\ No newline at end of file
+        return self.write_register(self.registers["inverter_enable"]["address"], value)
+
+
+class AsyncGrowattModbusClient(_GrowattModbusClientBase):
+    """Growatt Modbus client running on the asyncio event loop.
+
+    Clients for the same host and port share one connection, so several
+    inverters behind an RS485 gateway use a single socket. Besides Modbus
+    TCP, RTU framing over TCP or a local serial port (host is the device
+    path) is supported.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        slave: int,
+        timeout: int = 5,
+        max_gap: int = DEFAULT_MAX_GAP,
+        profile: str = DEFAULT_PROFILE,
+        transport: str = DEFAULT_TRANSPORT,
+        baudrate: int = DEFAULT_BAUDRATE,
+        pipelining: bool = False,
+    ):
+        """Initialize the Modbus client."""
+        super().__init__(host, port, slave, timeout, max_gap, profile)
+        self._connection: SharedConnection | None = acquire_connection(
+            host, port, timeout, transport, baudrate, pipelining
+        )
+        self.stats.frame_overhead = self._connection.frame_overhead
+        self._suspended = False
+        self._write_queue = WriteQueue(self.write_registers, self.holding)
+
+    @property
+    def pipelined(self) -> bool:
+        """Return True if requests are sent without waiting for responses."""
+        return self._connection is not None and self._connection.pipelined
+
+    @property
+    def round_trip(self) -> dict[str, Any] | None:
+        """Return the round-trip estimate of the connection."""
+        if self._connection is None:
+            return None
+        return self._connection.rtt.as_dict()
+
+    async def close(self):
+        """Release the shared Modbus connection."""
+        if self._connection is not None:
+            if self._suspended:
+                self._connection.resume()
+            release_connection(self._connection)
+            self._connection = None
+
+    async def suspend(self):
+        """Stop using the connection while the inverter sleeps."""
+        if self._connection is not None and not self._suspended:
+            self._suspended = True
+            self._connection.suspend()
+
+    async def resume(self):
+        """Use the connection again after sleeping."""
+        if self._connection is not None and self._suspended:
+            self._suspended = False
+            self._connection.resume()
+
+    async def read_register(self, address: int, count: int = 1, register_type: str = "input") -> list:
+        """Read from a Modbus register."""
+        if self._connection is None:
+            raise ModbusException("Client is closed")
+        self.breaker.check()
+
+        self.stats.record_read(count)
+        try:
+            registers = await self._connection.read_registers(
+                register_type, address, count, self.slave
+            )
+        except Exception as e:
+            self._request_failed(e)
+            _LOGGER.error(f"Error reading register {address}: {e}")
+            raise
+
+        self._read_succeeded(address, register_type, registers)
+        return registers
+
+    async def write_register(self, address: int, value: int, register_type: str = "holding") -> bool:
+        """Write to a Modbus register."""
+        if self._connection is None:
+            raise ModbusException("Client is closed")
+        if register_type != "holding":
+            raise ValueError("Can only write to holding registers")
+        self.breaker.check()
+
+        self.stats.record_write()
+        started = time.monotonic()
+        try:
+            success = await self._connection.write_register(
+                address, value, self.slave
+            )
+        except Exception as e:
+            self._request_failed(e)
+            _LOGGER.error(f"Error writing register {address}: {e}")
+            raise
+
+        self._write_done(address, [value], success, time.monotonic() - started)
+        return success
+
+    async def write_registers(self, address: int, values: list[int]) -> bool:
+        """Write consecutive holding registers, using one request if possible."""
+        if len(values) == 1:
+            return await self.write_register(address, values[0])
+        if self._connection is None:
+            raise ModbusException("Client is closed")
+        self.breaker.check()
+
+        self.stats.record_write(len(values))
+        started = time.monotonic()
+        try:
+            success = await self._connection.write_registers(
+                address, values, self.slave
+            )
+        except Exception as e:
+            self._request_failed(e)
+            _LOGGER.error(f"Error writing registers {address}-{address + len(values) - 1}: {e}")
+            raise
+
+        self._write_done(address, values, success, time.monotonic() - started)
+        return success
+
+    async def read_block(self, decoder: BlockDecoder, data: dict[str, Any]) -> bool:
+        """Read one block and decode its values into data.
+
+        Holding blocks are served from the cache while it is fresh. Returns
+        False if the inverter rejected the request. Connection failures are
+        raised so the caller aborts the poll.
+        """
+        if self._read_cached(decoder, data):
+            return True
+        block = decoder.block
+        if self.breaker.check():
+            # First request after an outage, probe with a single register
+            await self.read_register(self._probe["address"], 1, self._probe["type"])
+
+        try:
+            registers = await self.read_register(
+                block.address, block.count, block.register_type
+            )
+            decoder.decode_registers(registers, data)
+        except Exception as e:
+            if is_connection_error(e):
+                self.stats.record_error(block.keys)
+                raise
+            self._block_failed(block, data, e)
+            return False
+        return True
+
+    async def read_blocks(
+        self, decoders: list[BlockDecoder] | tuple[BlockDecoder, ...], data: dict[str, Any]
+    ) -> list[bool]:
+        """Read several blocks, returning whether each one was read.
+
+        On a pipelined connection all requests are sent at once, so the
+        blocks arrive after about one round trip. Connection failures are
+        raised.
+        """
+        if not self.pipelined or len(decoders) < 2 or self.breaker.state != STATE_CLOSED:
+            return [await self.read_block(decoder, data) for decoder in decoders]
+
+        results = await asyncio.gather(
+            *(self.read_block(decoder, data) for decoder in decoders),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def read_all_data(self) -> dict[str, Any]:
+        """Read all data from the inverter.
+
+        Raises ConnectionException if the inverter cannot be reached.
+        """
+        data = {}
+
+        await self.read_blocks(self._decode_plan, data)
+
+        self.add_derived_values(data)
+        return data
+
+    async def stream(
+        self, keys: Iterable[str], interval: float = DEFAULT_STREAM_INTERVAL
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the values of a few keys every interval seconds.
+
+        Only the blocks covering the keys are read, sharing the connection
+        with the regular poll. A read that overruns the interval starts the
+        next one right away without trying to catch up. Connection failures
+        end the stream.
+        """
+        keys = tuple(keys)
+        decoders = self.stream_plan(keys)
+        derived = "pv_power" in keys
+        next_read = time.monotonic()
+
+        while True:
+            data = {}
+            await self.read_blocks(decoders, data)
+            if derived:
+                self.add_derived_values(data)
+            yield {key: data.get(key) for key in keys}
+
+            next_read += interval
+            delay = next_read - time.monotonic()
+            if delay < 0:
+                next_read -= delay
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def read_identity(self) -> tuple[str, int]:
+        """Read the serial number and device type code of the inverter."""
+        registers = await self.read_register(
+            SERIAL_REGISTER, DEVICE_TYPE_REGISTER - SERIAL_REGISTER + 1, "holding"
+        )
+        return self.parse_identity(registers)
+
+    async def enable_cmd_memory(self) -> bool:
+        """Enable command memory mode."""
+        return await self.write_register(self.registers["cmd_memory"]["address"], 1)
+
+    async def set_power_limit(self, limit_percent: int) -> bool:
+        """Set power limit (0-100%).
+
+        Rapid changes are coalesced into a single write of the latest value,
+        sent together with the command memory flag when the registers are
+        adjacent.
+        """
+        self._check_limit(limit_percent)
+
+        return await self._write_queue.write(
+            {
+                self.registers["cmd_memory"]["address"]: 1,
+                self.registers["power_limit"]["address"]: limit_percent,
+            }
+        )
+
+    async def set_inverter_enable(self, enable: bool) -> bool:
+        """Enable or disable the inverter."""
+        value = 1 if enable else 0
+        return await self.write_register(self.registers["inverter_enable"]["address"], value)
@@ -3,11 +3,11 @@ import logging
 
 from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import CONF_MODEL, CONF_SERIAL, DOMAIN, MODEL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,10 +19,10 @@ async def async_setup_entry(
 ) -> None:
     """Set up Growatt Modbus number entities."""
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-    client = hass.data[DOMAIN][entry.entry_id]["client"]
+    controller = hass.data[DOMAIN][entry.entry_id]["controller"]
 
     entities = [
-        GrowattPowerLimitNumber(coordinator, entry, client),
+        GrowattPowerLimitNumber(coordinator, entry, controller),
     ]
 
     async_add_entities(entities)
@@ -31,11 +31,11 @@ async def async_setup_entry(
 class GrowattPowerLimitNumber(CoordinatorEntity, NumberEntity):
     """Number entity for power limit setting."""
 
-    def __init__(self, coordinator, entry, client):
+    def __init__(self, coordinator, entry, controller):
         """Initialize the number entity."""
         super().__init__(coordinator)
         self._entry = entry
-        self._client = client
+        self._controller = controller
         self._attr_unique_id = f"{entry.entry_id}_power_limit"
         self._attr_name = f"{entry.data['name']} Power Limit"
         self._attr_icon = "mdi:gauge"
@@ -44,7 +44,6 @@ class GrowattPowerLimitNumber(CoordinatorEntity, NumberEntity):
         self._attr_native_step = 5
         self._attr_native_unit_of_measurement = "%"
         self._attr_mode = NumberMode.SLIDER
-        self._value = 100
 
     @property
     def device_info(self):
@@ -53,27 +52,28 @@ class GrowattPowerLimitNumber(CoordinatorEntity, NumberEntity):
             "identifiers": {(DOMAIN, self._entry.entry_id)},
             "name": self._entry.data["name"],
             "manufacturer": "Growatt",
-            "model": "MIN5000TL-X",
+            "model": self._entry.data.get(CONF_MODEL, MODEL),
+            "serial_number": self._entry.data.get(CONF_SERIAL),
         }
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when availability changed."""
+        if self.coordinator.has_changed():
+            self.async_write_ha_state()
+
     @property
     def native_value(self):
         """Return the current value."""
-        return self._value
+        return self.coordinator.control.power_limit
 
     async def async_set_native_value(self, value: float) -> None:
         """Set new power limit value."""
-        self._value = int(value)
-        
-        # Check if curtailment is active
-        curtailment_switch_id = f"switch.{self._entry.data['name'].lower().replace(' ', '_')}_curtailment"
-        curtailment_switch = self.hass.states.get(curtailment_switch_id)
-        
+        control = self.coordinator.control
+        control.power_limit = int(value)
+
         # Only apply immediately if curtailment is active
-        if curtailment_switch and curtailment_switch.state == "on":
-            await self.hass.async_add_executor_job(
-                self._client.set_power_limit, self._value
-            )
-            await self.coordinator.async_request_refresh()
-        
-        self.async_write_ha_state()
\ No newline at end of file
+        if control.curtailment:
+            await self._controller.async_apply()
+
+        self.async_write_ha_state()
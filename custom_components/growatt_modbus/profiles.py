@@ -0,0 +1,133 @@
+"""Register profiles of the supported Growatt inverter families.
+
+Each family's register map lives in ``profiles/<name>.json``:
+
+    {
+      "name": "MIN TL-X",
+      "device_type_codes": [[5100, 5199]],
+      "registers": {
+        "status": {"address": 0, "type": "input", "data_type": "uint16", "interval": "fast"},
+        ...
+      }
+    }
+
+``device_type_codes`` are the ranges of the device type code (holding
+register 43) identifying the family. A register's ``interval`` names its
+poll tier, registers without one are polled every DEFAULT_SCAN_INTERVAL
+seconds.
+"""
+import json
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from .const import (
+    DEFAULT_MAX_GAP,
+    DEFAULT_PROFILE,
+    SCAN_INTERVAL_FAST,
+    SCAN_INTERVAL_SLOW,
+)
+from .read_plan import BlockDecoder, compile_decode_plan
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(__file__).parent / "profiles"
+
+INTERVALS = {
+    "fast": SCAN_INTERVAL_FAST,
+    "slow": SCAN_INTERVAL_SLOW,
+}
+
+
+@dataclass(frozen=True)
+class Profile:
+    """The register map of one Growatt inverter family."""
+
+    key: str
+    name: str
+    device_type_codes: tuple[tuple[int, int], ...]
+    registers: dict[str, dict[str, Any]]
+
+    def matches(self, device_type_code: int) -> bool:
+        """Return True if a device type code belongs to this family."""
+        return any(low <= device_type_code <= high for low, high in self.device_type_codes)
+
+
+def _load_profile(path: Path) -> Profile:
+    """Load a profile from its data file."""
+    with path.open(encoding="utf-8") as file:
+        raw = json.load(file)
+
+    registers = {}
+    for key, reg_info in raw["registers"].items():
+        reg_info = dict(reg_info)
+        if "interval" in reg_info:
+            reg_info["interval"] = INTERVALS[reg_info["interval"]]
+        registers[key] = reg_info
+
+    return Profile(
+        key=path.stem,
+        name=raw["name"],
+        device_type_codes=tuple(tuple(codes) for codes in raw["device_type_codes"]),
+        registers=registers,
+    )
+
+
+# Loaded once at import, which Home Assistant runs outside the event loop
+PROFILES: dict[str, Profile] = {
+    path.stem: _load_profile(path) for path in sorted(PROFILE_DIR.glob("*.json"))
+}
+
+
+def get_profile(key: str) -> Profile:
+    """Return a profile by its key, e.g. "min"."""
+    try:
+        return PROFILES[key]
+    except KeyError:
+        raise ValueError(f"Unknown inverter profile: {key}") from None
+
+
+def detect_profile(device_type_code: int) -> Profile:
+    """Return the profile of a device type code, MIN if it is unknown."""
+    for profile in PROFILES.values():
+        if profile.matches(device_type_code):
+            return profile
+    _LOGGER.warning(
+        f"Unknown device type code {device_type_code}, using the "
+        f"{PROFILES[DEFAULT_PROFILE].name} register map"
+    )
+    return PROFILES[DEFAULT_PROFILE]
+
+
+@lru_cache(maxsize=None)
+def get_decode_plan(
+    key: str, max_gap: int = DEFAULT_MAX_GAP, keys: frozenset[str] | None = None
+) -> tuple[BlockDecoder, ...]:
+    """Return the compiled block reads of a profile, shared by all clients.
+
+    With keys, only the blocks covering those registers are read, each
+    still at its own interval.
+    """
+    registers = get_profile(key).registers
+    if keys is not None:
+        registers = {name: info for name, info in registers.items() if name in keys}
+    return tuple(compile_decode_plan(registers, max_gap))
+
+
+@lru_cache(maxsize=None)
+def get_stream_plan(
+    key: str, keys: frozenset[str], max_gap: int = DEFAULT_MAX_GAP
+) -> tuple[BlockDecoder, ...]:
+    """Return the fewest block reads covering some registers of a profile.
+
+    Poll intervals are ignored, so registers of different tiers can share a
+    block.
+    """
+    registers = get_profile(key).registers
+    subset = {
+        name: {field: value for field, value in registers[name].items() if field != "interval"}
+        for name in keys
+    }
+    return tuple(compile_decode_plan(subset, max_gap))
@@ -0,0 +1,115 @@
+"""Read planning for Growatt Modbus register maps."""
+from dataclasses import dataclass
+from typing import Any
+
+from .const import DEFAULT_MAX_GAP, DEFAULT_SCAN_INTERVAL, MAX_REGISTERS_PER_READ
+
+
+@dataclass(frozen=True)
+class ReadBlock:
+    """A contiguous span of registers fetched with a single request."""
+
+    register_type: str
+    address: int
+    count: int
+    keys: tuple[str, ...]
+    interval: int = DEFAULT_SCAN_INTERVAL
+
+
+def register_count(reg_info: dict[str, Any]) -> int:
+    """Return the number of 16-bit registers a value occupies."""
+    return 2 if reg_info["data_type"] in ("uint32", "int32") else 1
+
+
+def build_read_plan(
+    registers: dict[str, dict[str, Any]],
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_count: int = MAX_REGISTERS_PER_READ,
+) -> list[ReadBlock]:
+    """Merge a register map into the fewest contiguous block reads.
+
+    Registers of the same type and poll interval are sorted by address and
+    merged while the number of unused registers between them is at most
+    ``max_gap`` and the resulting span stays within ``max_count`` registers.
+    """
+    groups: dict[tuple[str, int], list[tuple[int, int, str]]] = {}
+    for key, reg_info in registers.items():
+        start = reg_info["address"]
+        end = start + register_count(reg_info)
+        group = (reg_info["type"], reg_info.get("interval", DEFAULT_SCAN_INTERVAL))
+        groups.setdefault(group, []).append((start, end, key))
+
+    plan = []
+    for (register_type, interval), entries in groups.items():
+        entries.sort()
+        spans: list[list] = []
+
+        for start, end, key in entries:
+            if spans:
+                span = spans[-1]
+                span_end = max(end, span[1])
+                if start - span[1] <= max_gap and span_end - span[0] <= max_count:
+                    span[1] = span_end
+                    span[2].append(key)
+                    continue
+            spans.append([start, end, [key]])
+
+        plan.extend(
+            ReadBlock(register_type, start, end - start, tuple(keys), interval)
+            for start, end, keys in spans
+        )
+
+    return plan
+
+
+_DATA_TYPES = ("uint16", "int16", "uint32", "int32")
+
+
+class BlockDecoder:
+    """Decoder for one block, compiled from the register map.
+
+    Register lists, as the transports return them, are decoded by a loop
+    over precomputed offsets and scales, one per data type.
+    """
+
+    def __init__(self, block: ReadBlock, registers: dict[str, dict[str, Any]]):
+        """Compile the decoder for a block."""
+        self.block = block
+        self.keys = block.keys
+
+        fields = {data_type: [] for data_type in _DATA_TYPES}
+        for key in block.keys:
+            reg_info = registers[key]
+            data_type = reg_info["data_type"] if reg_info["data_type"] in fields else "uint16"
+            fields[data_type].append(
+                (key, reg_info["address"] - block.address, reg_info.get("scale", 1))
+            )
+        self._uint16 = tuple(fields["uint16"])
+        self._int16 = tuple(fields["int16"])
+        self._uint32 = tuple(fields["uint32"])
+        self._int32 = tuple(fields["int32"])
+
+    def decode_registers(self, registers: list[int], data: dict[str, Any]) -> None:
+        """Decode a list of register values into ``data``."""
+        for key, offset, scale in self._uint16:
+            data[key] = registers[offset] * scale
+        for key, offset, scale in self._int16:
+            value = registers[offset]
+            data[key] = (value - 0x10000 if value & 0x8000 else value) * scale
+        for key, offset, scale in self._uint32:
+            data[key] = ((registers[offset] << 16) | registers[offset + 1]) * scale
+        for key, offset, scale in self._int32:
+            value = (registers[offset] << 16) | registers[offset + 1]
+            data[key] = (value - 0x100000000 if value & 0x80000000 else value) * scale
+
+
+def compile_decode_plan(
+    registers: dict[str, dict[str, Any]],
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_count: int = MAX_REGISTERS_PER_READ,
+) -> list[BlockDecoder]:
+    """Plan the block reads for a register map and compile their decoders."""
+    return [
+        BlockDecoder(block, registers)
+        for block in build_read_plan(registers, max_gap, max_count)
+    ]
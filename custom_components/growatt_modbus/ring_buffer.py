@@ -0,0 +1,128 @@
+"""Rolling window of recent register samples."""
+import math
+from array import array
+from collections import deque
+from typing import Any
+
+
+class RingBuffer:
+    """Fixed-size ring of timestamped samples with rolling statistics.
+
+    Values are kept as 32-bit floats next to their monotonic timestamps in
+    two preallocated arrays. Samples older than ``window`` seconds, or the
+    oldest one once the ring is full, drop out as new ones arrive. The sum
+    and monotonic queues for the minimum and maximum are updated on every
+    append and eviction, so statistics never rescan the samples.
+    """
+
+    def __init__(self, window: float, capacity: int):
+        """Initialize an empty buffer."""
+        self.window = window
+        self.capacity = capacity
+        self._values = array("f", bytes(4 * capacity))
+        self._times = array("d", bytes(8 * capacity))
+        # Sequence numbers of the oldest sample and of the next one
+        self._start = 0
+        self._end = 0
+        self._sum = 0.0
+        # Sequence numbers of candidate minimums (ascending values) and
+        # maximums (descending values)
+        self._min: deque[int] = deque()
+        self._max: deque[int] = deque()
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return self._end - self._start
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample and drop the ones that left the window."""
+        if self._end - self._start == self.capacity:
+            self._evict()
+        index = self._end % self.capacity
+        self._values[index] = value
+        self._times[index] = timestamp
+        # Use the stored float32, so eviction subtracts exactly what was added
+        value = self._values[index]
+        self._sum += value
+
+        while self._min and self._value(self._min[-1]) >= value:
+            self._min.pop()
+        self._min.append(self._end)
+        while self._max and self._value(self._max[-1]) <= value:
+            self._max.pop()
+        self._max.append(self._end)
+
+        self._end += 1
+        self.expire(timestamp)
+
+    def expire(self, now: float) -> None:
+        """Drop samples older than the window."""
+        cutoff = now - self.window
+        while self._start < self._end and self._times[self._start % self.capacity] < cutoff:
+            self._evict()
+
+    def statistics(self) -> dict[str, Any]:
+        """Return count, min, max and mean of the samples in the window."""
+        count = self._end - self._start
+        if not count:
+            return {"count": 0, "min": None, "max": None, "mean": None}
+        return {
+            "count": count,
+            "min": self._value(self._min[0]),
+            "max": self._value(self._max[0]),
+            "mean": self._sum / count,
+        }
+
+    def _value(self, sequence: int) -> float:
+        return self._values[sequence % self.capacity]
+
+    def _evict(self) -> None:
+        """Drop the oldest sample."""
+        self._sum -= self._value(self._start)
+        if self._min[0] == self._start:
+            self._min.popleft()
+        if self._max[0] == self._start:
+            self._max.popleft()
+        self._start += 1
+        if self._start == self._end:
+            # Clear rounding drift whenever the buffer runs empty
+            self._sum = 0.0
+
+
+class SampleHistory:
+    """Ring buffers of one inverter's registers over a common window.
+
+    Each register gets a buffer sized for its poll interval, created on its
+    first sample. Missing values are skipped rather than stored.
+    """
+
+    def __init__(self, window: float, intervals: dict[str, float]):
+        """Initialize the history."""
+        self.window = window
+        self._intervals = intervals
+        self._buffers: dict[str, RingBuffer] = {}
+
+    def record(self, now: float, data: dict[str, Any], keys) -> None:
+        """Append the current values of keys."""
+        for key in keys:
+            value = data.get(key)
+            if value is None:
+                continue
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                interval = self._intervals.get(key, 1)
+                capacity = math.ceil(self.window / interval) + 1
+                buffer = self._buffers[key] = RingBuffer(self.window, capacity)
+            buffer.append(now, value)
+
+    def statistics(self, key: str, now: float) -> dict[str, Any] | None:
+        """Return the rolling statistics of a key, None if it has no samples."""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            return None
+        buffer.expire(now)
+        return buffer.statistics()
+
+    def keys(self):
+        """Return the keys with a buffer."""
+        return self._buffers.keys()
@@ -0,0 +1,62 @@
+"""Round-trip time estimation for Modbus requests."""
+from typing import Any
+
+# Smoothing gains of RFC 6298
+ALPHA = 1 / 8
+BETA = 1 / 4
+K = 4
+
+
+class RttEstimator:
+    """Smoothed round-trip time and request timeout of one connection.
+
+    Follows TCP's retransmission timer (RFC 6298): the timeout is the
+    smoothed RTT plus four times its mean deviation, kept between ``floor``
+    and ``ceiling``. Until the first sample it is the ceiling. A timeout
+    doubles it until the next sample; only requests answered on their
+    first attempt are sampled, as the response to a retried one may belong
+    to either attempt.
+    """
+
+    def __init__(self, floor: float, ceiling: float):
+        """Initialize the estimator."""
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self.rto = self.ceiling
+        self.samples = 0
+        self.timeouts = 0
+
+    def sample(self, rtt: float) -> None:
+        """Update the estimate with the round trip of an answered request."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+        self.samples += 1
+        self.rto = self._clamp(self.srtt + K * self.rttvar)
+
+    def backoff(self, timeout: float) -> None:
+        """Double the timeout after a request timed out after ``timeout``.
+
+        Requests in flight together that time out at once double the
+        timeout once rather than once each.
+        """
+        self.timeouts += 1
+        self.rto = self._clamp(max(self.rto, timeout * 2))
+
+    def _clamp(self, timeout: float) -> float:
+        return min(self.ceiling, max(self.floor, timeout))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the estimate for diagnostics."""
+        return {
+            "srtt": self.srtt,
+            "rttvar": self.rttvar,
+            "rto": self.rto,
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+        }
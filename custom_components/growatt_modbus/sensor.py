@@ -1,121 +1,344 @@
 """Sensor platform for Growatt Modbus."""
 import logging
+import time
+from datetime import timedelta
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfEnergy,
     UnitOfFrequency,
+    UnitOfInformation,
     UnitOfPower,
     UnitOfTemperature,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, STATUS_CODES
+from .const import (
+    CONF_MODEL,
+    CONF_SERIAL,
+    CONTROL_KEYS,
+    DOMAIN,
+    MODEL,
+    STATISTICS_REFRESH_INTERVAL,
+    STATUS_CODES,
+)
+from .stats import PollStatistics
 
 _LOGGER = logging.getLogger(__name__)
 
 
-SENSOR_TYPES = {
+@dataclass(frozen=True, kw_only=True)
+class GrowattSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor showing a value of the inverter profiles."""
+
+    # State is only written once the value moved at least this far from
+    # the value last reported, None writes every change
+    deadband: float | None = None
+    # Polled even while the sensor is disabled
+    always_read: bool = False
+
+
+@dataclass(frozen=True, kw_only=True)
+class GrowattDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor computed from the poll statistics."""
+
+    value_fn: Callable[[PollStatistics], Any]
+
+
+# Keys name the values of the inverter profiles. A sensor is created for
+# each value the model provides, and the coordinator polls its registers only
+# while the sensor is enabled or always_read is set.
+SENSOR_DESCRIPTIONS: tuple[GrowattSensorEntityDescription, ...] = (
     # PV Strings
-    "pv1_voltage": {
-        "name": "PV1 Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "device_class": SensorDeviceClass.VOLTAGE,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "icon": "mdi:lightning-bolt",
-    },
-    "pv1_current": {
-        "name": "PV1 Current",
-        "unit": UnitOfElectricCurrent.AMPERE,
-        "device_class": SensorDeviceClass.CURRENT,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "icon": "mdi:current-dc",
-    },
-    "pv2_voltage": {
-        "name": "PV2 Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "device_class": SensorDeviceClass.VOLTAGE,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "icon": "mdi:lightning-bolt",
-    },
-    "pv2_current": {
-        "name": "PV2 Current",
-        "unit": UnitOfElectricCurrent.AMPERE,
-        "device_class": SensorDeviceClass.CURRENT,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "icon": "mdi:current-dc",
-    },
-    "pv_power": {
-        "name": "PV Power",
-        "unit": UnitOfPower.WATT,
-        "device_class": SensorDeviceClass.POWER,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "icon": "mdi:solar-power",
-    },
+    GrowattSensorEntityDescription(
+        key="pv1_voltage",
+        name="PV1 Voltage",
+        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        device_class=SensorDeviceClass.VOLTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:lightning-bolt",
+        deadband=0.5,
+    ),
+    GrowattSensorEntityDescription(
+        key="pv1_current",
+        name="PV1 Current",
+        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:current-dc",
+        deadband=0.05,
+    ),
+    GrowattSensorEntityDescription(
+        key="pv2_voltage",
+        name="PV2 Voltage",
+        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        device_class=SensorDeviceClass.VOLTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:lightning-bolt",
+        deadband=0.5,
+    ),
+    GrowattSensorEntityDescription(
+        key="pv2_current",
+        name="PV2 Current",
+        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:current-dc",
+        deadband=0.05,
+    ),
+    GrowattSensorEntityDescription(
+        key="pv_power",
+        name="PV Power",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:solar-power",
+        deadband=5,
+        always_read=True,
+    ),
     # AC Output
-    "ac_power": {
-        "name": "AC Output Power",
-        "unit": UnitOfPower.WATT,
-        "device_class": SensorDeviceClass.POWER,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "icon": "mdi:power-plug",
-    },
-    "ac_voltage": {
-        "name": "AC Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "device_class": SensorDeviceClass.VOLTAGE,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "ac_current": {
-        "name": "AC Current",
-        "unit": UnitOfElectricCurrent.AMPERE,
-        "device_class": SensorDeviceClass.CURRENT,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "ac_frequency": {
-        "name": "AC Frequency",
-        "unit": UnitOfFrequency.HERTZ,
-        "device_class": SensorDeviceClass.FREQUENCY,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
+    GrowattSensorEntityDescription(
+        key="ac_power",
+        name="AC Output Power",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:power-plug",
+        deadband=5,
+        always_read=True,
+    ),
+    GrowattSensorEntityDescription(
+        key="ac_voltage",
+        name="AC Voltage",
+        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        device_class=SensorDeviceClass.VOLTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
+    ),
+    GrowattSensorEntityDescription(
+        key="ac_current",
+        name="AC Current",
+        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.05,
+    ),
+    GrowattSensorEntityDescription(
+        key="ac_voltage_l2",
+        name="AC Voltage L2",
+        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        device_class=SensorDeviceClass.VOLTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
+    ),
+    GrowattSensorEntityDescription(
+        key="ac_current_l2",
+        name="AC Current L2",
+        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.05,
+    ),
+    GrowattSensorEntityDescription(
+        key="ac_voltage_l3",
+        name="AC Voltage L3",
+        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        device_class=SensorDeviceClass.VOLTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
+    ),
+    GrowattSensorEntityDescription(
+        key="ac_current_l3",
+        name="AC Current L3",
+        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.05,
+    ),
+    GrowattSensorEntityDescription(
+        key="ac_frequency",
+        name="AC Frequency",
+        native_unit_of_measurement=UnitOfFrequency.HERTZ,
+        device_class=SensorDeviceClass.FREQUENCY,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.02,
+    ),
     # Energy
-    "today_energy": {
-        "name": "Today Energy",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-        "icon": "mdi:solar-power",
-    },
-    "total_energy": {
-        "name": "Total Energy",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-        "icon": "mdi:solar-power",
-    },
+    GrowattSensorEntityDescription(
+        key="today_energy",
+        name="Today Energy",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:solar-power",
+    ),
+    GrowattSensorEntityDescription(
+        key="total_energy",
+        name="Total Energy",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:solar-power",
+    ),
+    # Battery
+    GrowattSensorEntityDescription(
+        key="battery_soc",
+        name="Battery State of Charge",
+        native_unit_of_measurement=PERCENTAGE,
+        device_class=SensorDeviceClass.BATTERY,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    GrowattSensorEntityDescription(
+        key="battery_voltage",
+        name="Battery Voltage",
+        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        device_class=SensorDeviceClass.VOLTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
+    ),
+    GrowattSensorEntityDescription(
+        key="battery_charge_power",
+        name="Battery Charge Power",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:battery-arrow-up",
+        deadband=5,
+    ),
+    GrowattSensorEntityDescription(
+        key="battery_discharge_power",
+        name="Battery Discharge Power",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:battery-arrow-down",
+        deadband=5,
+    ),
     # Status
-    "temperature": {
-        "name": "Temperature",
-        "unit": UnitOfTemperature.CELSIUS,
-        "device_class": SensorDeviceClass.TEMPERATURE,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "status": {
-        "name": "Status",
-        "icon": "mdi:information",
-    },
+    GrowattSensorEntityDescription(
+        key="temperature",
+        name="Temperature",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=0.5,
+    ),
+    GrowattSensorEntityDescription(
+        key="status",
+        name="Status",
+        icon="mdi:information",
+        always_read=True,
+    ),
+)
+
+DEADBANDS = {
+    description.key: description.deadband
+    for description in SENSOR_DESCRIPTIONS
+    if description.deadband is not None
+}
+
+# Status and PV power decide when the inverter sleeps, the export limit
+# controller follows the AC output
+REQUIRED_KEYS = CONTROL_KEYS | {
+    description.key for description in SENSOR_DESCRIPTIONS if description.always_read
 }
 
 
+def _milliseconds(seconds):
+    """Convert seconds to rounded milliseconds."""
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+# Poll performance sensors, disabled by default
+DIAGNOSTIC_SENSOR_DESCRIPTIONS: tuple[GrowattDiagnosticSensorEntityDescription, ...] = (
+    GrowattDiagnosticSensorEntityDescription(
+        key="poll_duration",
+        name="Poll Duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-outline",
+        value_fn=lambda stats: _milliseconds(stats.last_duration),
+    ),
+    GrowattDiagnosticSensorEntityDescription(
+        key="poll_requests",
+        name="Poll Requests",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:swap-horizontal",
+        value_fn=lambda stats: stats.last_requests,
+    ),
+    GrowattDiagnosticSensorEntityDescription(
+        key="poll_bytes",
+        name="Poll Bytes",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:transfer",
+        value_fn=lambda stats: stats.last_bytes,
+    ),
+    GrowattDiagnosticSensorEntityDescription(
+        key="poll_latency_p50",
+        name="Poll Latency P50",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-outline",
+        value_fn=lambda stats: _milliseconds(stats.percentiles()["p50"]),
+    ),
+    GrowattDiagnosticSensorEntityDescription(
+        key="poll_latency_p95",
+        name="Poll Latency P95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-outline",
+        value_fn=lambda stats: _milliseconds(stats.percentiles()["p95"]),
+    ),
+    GrowattDiagnosticSensorEntityDescription(
+        key="poll_latency_p99",
+        name="Poll Latency P99",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-outline",
+        value_fn=lambda stats: _milliseconds(stats.percentiles()["p99"]),
+    ),
+    GrowattDiagnosticSensorEntityDescription(
+        key="write_latency_p95",
+        name="Write Latency P95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-outline",
+        value_fn=lambda stats: _milliseconds(stats.write_percentiles()["p95"]),
+    ),
+    GrowattDiagnosticSensorEntityDescription(
+        key="register_errors",
+        name="Register Errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:alert-circle-outline",
+        value_fn=lambda stats: stats.failed_requests,
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -123,10 +346,15 @@ async def async_setup_entry(
 ) -> None:
     """Set up Growatt Modbus sensors."""
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    keys = coordinator.client.keys
 
     entities = []
-    for sensor_type in SENSOR_TYPES:
-        entities.append(GrowattSensor(coordinator, entry, sensor_type))
+    for description in SENSOR_DESCRIPTIONS:
+        # Only values the model's register map provides
+        if description.key in keys:
+            entities.append(GrowattSensor(coordinator, entry, description))
+    for description in DIAGNOSTIC_SENSOR_DESCRIPTIONS:
+        entities.append(GrowattDiagnosticSensor(coordinator, entry, description))
 
     async_add_entities(entities)
 
@@ -134,19 +362,48 @@ async def async_setup_entry(
 class GrowattSensor(CoordinatorEntity, SensorEntity):
     """Representation of a Growatt Modbus sensor."""
 
-    def __init__(self, coordinator, entry, sensor_type):
+    # The rolling statistics change with every poll, recording them would
+    # undo the deadband's saving of recorder writes
+    _unrecorded_attributes = frozenset({"min", "max", "mean"})
+
+    def __init__(self, coordinator, entry, description: GrowattSensorEntityDescription):
         """Initialize the sensor."""
         super().__init__(coordinator)
+        self.entity_description = description
         self._entry = entry
-        self._sensor_type = sensor_type
-        self._attr_unique_id = f"{entry.entry_id}_{sensor_type}"
-        
-        sensor_info = SENSOR_TYPES[sensor_type]
-        self._attr_name = f"{entry.data['name']} {sensor_info['name']}"
-        self._attr_native_unit_of_measurement = sensor_info.get("unit")
-        self._attr_device_class = sensor_info.get("device_class")
-        self._attr_state_class = sensor_info.get("state_class")
-        self._attr_icon = sensor_info.get("icon")
+        self._sensor_type = description.key
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_name = f"{entry.data['name']} {description.name}"
+        self._statistics: dict[str, float] = {}
+
+    async def async_added_to_hass(self) -> None:
+        """Refresh the rolling statistics while the value holds steady."""
+        await super().async_added_to_hass()
+        if self.entity_description.state_class == SensorStateClass.MEASUREMENT:
+            self.async_on_remove(
+                async_track_time_interval(
+                    self.hass,
+                    self._async_refresh_statistics,
+                    timedelta(seconds=STATISTICS_REFRESH_INTERVAL),
+                )
+            )
+
+    @callback
+    def _async_refresh_statistics(self, _now) -> None:
+        """Write state if the statistics moved since the last write."""
+        if self.available and self._rolling_statistics() != self._statistics:
+            self.async_write_ha_state()
+
+    def _rolling_statistics(self) -> dict[str, float]:
+        """Return min, max and mean over the history window."""
+        stats = self.coordinator.history.statistics(self._sensor_type, time.monotonic())
+        if stats is None or not stats["count"]:
+            return {}
+        return {
+            "min": round(stats["min"], 2),
+            "max": round(stats["max"], 2),
+            "mean": round(stats["mean"], 2),
+        }
 
     @property
     def device_info(self):
@@ -155,15 +412,24 @@ class GrowattSensor(CoordinatorEntity, SensorEntity):
             "identifiers": {(DOMAIN, self._entry.entry_id)},
             "name": self._entry.data["name"],
             "manufacturer": "Growatt",
-            "model": "MIN5000TL-X",
+            "model": self._entry.data.get(CONF_MODEL, MODEL),
+            "serial_number": self._entry.data.get(CONF_SERIAL),
         }
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the value moved past its deadband."""
+        if self.coordinator.has_changed(self._sensor_type):
+            self.async_write_ha_state()
+
     @property
     def native_value(self):
         """Return the state of the sensor."""
         value = self.coordinator.data.get(self._sensor_type)
         
         # Convert status code to text
+        if self._sensor_type == "status" and self.coordinator.sleeping:
+            return "Sleeping"
         if self._sensor_type == "status" and value is not None:
             return STATUS_CODES.get(int(value), f"Unknown ({value})")
         
@@ -175,4 +441,65 @@ class GrowattSensor(CoordinatorEntity, SensorEntity):
         return (
             self.coordinator.last_update_success
             and self.coordinator.data.get(self._sensor_type) is not None
-        )
\ No newline at end of file
+        )
+
+    @property
+    def extra_state_attributes(self):
+        """Return rolling statistics and flag values not read live."""
+        attributes = {}
+        if self.entity_description.state_class == SensorStateClass.MEASUREMENT:
+            self._statistics = self._rolling_statistics()
+            attributes.update(self._statistics)
+        if self.coordinator.sleeping:
+            attributes["sleeping"] = True
+        if self.coordinator.restored:
+            attributes["restored"] = True
+        return attributes or None
+
+
+class GrowattDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Sensor reporting the poll performance of a Growatt inverter."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    entity_description: GrowattDiagnosticSensorEntityDescription
+
+    def __init__(
+        self, coordinator, entry, description: GrowattDiagnosticSensorEntityDescription
+    ):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._entry = entry
+        self._sensor_type = description.key
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_name = f"{entry.data['name']} {description.name}"
+
+    @property
+    def device_info(self):
+        """Return device information."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+            "name": self._entry.data["name"],
+            "manufacturer": "Growatt",
+            "model": self._entry.data.get(CONF_MODEL, MODEL),
+            "serial_number": self._entry.data.get(CONF_SERIAL),
+        }
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.client.stats)
+
+    @property
+    def extra_state_attributes(self):
+        """Return per-register error counters."""
+        if self._sensor_type != "register_errors":
+            return None
+        return dict(self.coordinator.client.stats.register_errors)
+
+    @property
+    def available(self):
+        """Return True, poll statistics are most useful while polls fail."""
+        return True
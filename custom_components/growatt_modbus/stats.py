@@ -0,0 +1,119 @@
+"""Poll statistics for Growatt Modbus clients."""
+import statistics
+from collections import deque
+from typing import Any
+
+from .const import DEFAULT_STATS_WINDOW
+
+# PDU sizes, each frame adds the framing overhead of the transport
+READ_REQUEST_BYTES = 5
+READ_RESPONSE_BASE_BYTES = 2
+WRITE_REQUEST_BYTES = 5
+WRITE_MULTIPLE_REQUEST_BASE_BYTES = 6
+WRITE_RESPONSE_BYTES = 5
+
+# Modbus TCP frames carry a 7 byte MBAP header
+TCP_FRAME_OVERHEAD = 7
+
+
+def _percentiles(samples) -> dict[str, float | None]:
+    """Return p50, p95 and p99 of a series of samples."""
+    samples = list(samples)
+    if len(samples) < 2:
+        value = samples[0] if samples else None
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+class PollStatistics:
+    """Counters and rolling latency percentiles of one inverter's polls."""
+
+    def __init__(
+        self, window: int = DEFAULT_STATS_WINDOW, frame_overhead: int = TCP_FRAME_OVERHEAD
+    ):
+        """Initialize the statistics."""
+        self.frame_overhead = frame_overhead
+        self.polls = 0
+        self.failed_polls = 0
+        self.requests = 0
+        self.failed_requests = 0
+        self.bytes = 0
+        self.last_duration: float | None = None
+        self.last_requests = 0
+        self.last_bytes = 0
+        self.register_errors: dict[str, int] = {}
+        self._durations: deque[float] = deque(maxlen=window)
+        self._write_latencies: deque[float] = deque(maxlen=window)
+        self._poll_requests = 0
+        self._poll_bytes = 0
+
+    def record_read(self, count: int) -> None:
+        """Count a read request of ``count`` registers."""
+        self._record(
+            READ_REQUEST_BYTES + READ_RESPONSE_BASE_BYTES + 2 * count
+            + 2 * self.frame_overhead
+        )
+
+    def record_write(self, count: int = 1) -> None:
+        """Count a write request of ``count`` registers."""
+        if count == 1:
+            request = WRITE_REQUEST_BYTES
+        else:
+            request = WRITE_MULTIPLE_REQUEST_BASE_BYTES + 2 * count
+        self._record(request + WRITE_RESPONSE_BYTES + 2 * self.frame_overhead)
+
+    def _record(self, size: int) -> None:
+        self.requests += 1
+        self.bytes += size
+        self._poll_requests += 1
+        self._poll_bytes += size
+
+    def record_error(self, keys: tuple[str, ...]) -> None:
+        """Count a failed request for the registers it covered."""
+        self.failed_requests += 1
+        for key in keys:
+            self.register_errors[key] = self.register_errors.get(key, 0) + 1
+
+    def start_poll(self) -> None:
+        """Reset the per-poll counters."""
+        self._poll_requests = 0
+        self._poll_bytes = 0
+
+    def finish_poll(self, duration: float, success: bool = True) -> None:
+        """Record the outcome of a poll."""
+        self.polls += 1
+        if not success:
+            self.failed_polls += 1
+        self.last_duration = duration
+        self.last_requests = self._poll_requests
+        self.last_bytes = self._poll_bytes
+        self._durations.append(duration)
+
+    def record_write_latency(self, latency: float) -> None:
+        """Record the seconds a write took, including time spent queued."""
+        self._write_latencies.append(latency)
+
+    def percentiles(self) -> dict[str, float | None]:
+        """Return p50, p95 and p99 of the recent poll durations in seconds."""
+        return _percentiles(self._durations)
+
+    def write_percentiles(self) -> dict[str, float | None]:
+        """Return p50, p95 and p99 of the recent write latencies in seconds."""
+        return _percentiles(self._write_latencies)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all statistics as a dictionary."""
+        return {
+            "polls": self.polls,
+            "failed_polls": self.failed_polls,
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "bytes": self.bytes,
+            "last_duration": self.last_duration,
+            "last_requests": self.last_requests,
+            "last_bytes": self.last_bytes,
+            "latency": self.percentiles(),
+            "write_latency": self.write_percentiles(),
+            "register_errors": dict(self.register_errors),
+        }
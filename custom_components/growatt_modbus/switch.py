@@ -3,11 +3,11 @@ import logging
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import CONF_MODEL, CONF_SERIAL, DOMAIN, MODEL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,10 +20,11 @@ async def async_setup_entry(
     """Set up Growatt Modbus switches."""
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
     client = hass.data[DOMAIN][entry.entry_id]["client"]
+    controller = hass.data[DOMAIN][entry.entry_id]["controller"]
 
     entities = [
         GrowattInverterEnableSwitch(coordinator, entry, client),
-        GrowattCurtailmentSwitch(coordinator, entry, client),
+        GrowattCurtailmentSwitch(coordinator, entry, controller),
     ]
 
     async_add_entities(entities)
@@ -48,9 +49,16 @@ class GrowattInverterEnableSwitch(CoordinatorEntity, SwitchEntity):
             "identifiers": {(DOMAIN, self._entry.entry_id)},
             "name": self._entry.data["name"],
             "manufacturer": "Growatt",
-            "model": "MIN5000TL-X",
+            "model": self._entry.data.get(CONF_MODEL, MODEL),
+            "serial_number": self._entry.data.get(CONF_SERIAL),
         }
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the inverter status changed."""
+        if self.coordinator.has_changed("status"):
+            self.async_write_ha_state()
+
     @property
     def is_on(self):
         """Return true if inverter is enabled."""
@@ -60,27 +68,26 @@ class GrowattInverterEnableSwitch(CoordinatorEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs):
         """Turn on the inverter."""
-        await self.hass.async_add_executor_job(self._client.set_inverter_enable, True)
+        await self._client.set_inverter_enable(True)
         await self.coordinator.async_request_refresh()
 
     async def async_turn_off(self, **kwargs):
         """Turn off the inverter."""
-        await self.hass.async_add_executor_job(self._client.set_inverter_enable, False)
+        await self._client.set_inverter_enable(False)
         await self.coordinator.async_request_refresh()
 
 
 class GrowattCurtailmentSwitch(CoordinatorEntity, SwitchEntity):
     """Switch to enable/disable power curtailment."""
 
-    def __init__(self, coordinator, entry, client):
+    def __init__(self, coordinator, entry, controller):
         """Initialize the switch."""
         super().__init__(coordinator)
         self._entry = entry
-        self._client = client
+        self._controller = controller
         self._attr_unique_id = f"{entry.entry_id}_curtailment"
         self._attr_name = f"{entry.data['name']} Curtailment"
         self._attr_icon = "mdi:solar-power-variant-outline"
-        self._is_on = False
 
     @property
     def device_info(self):
@@ -89,31 +96,38 @@ class GrowattCurtailmentSwitch(CoordinatorEntity, SwitchEntity):
             "identifiers": {(DOMAIN, self._entry.entry_id)},
             "name": self._entry.data["name"],
             "manufacturer": "Growatt",
-            "model": "MIN5000TL-X",
+            "model": self._entry.data.get(CONF_MODEL, MODEL),
+            "serial_number": self._entry.data.get(CONF_SERIAL),
         }
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state when availability or the applied limit changed."""
+        if self.coordinator.has_changed("power_limit"):
+            self.async_write_ha_state()
+
     @property
     def is_on(self):
         """Return true if curtailment is active."""
-        return self._is_on
+        return self.coordinator.control.curtailment
+
+    @property
+    def extra_state_attributes(self):
+        """Return the limit in effect and the export it reacts to."""
+        control = self.coordinator.control
+        attributes = {"applied_limit": control.applied_limit}
+        if self._controller.export_entity is not None:
+            attributes["export_power"] = control.export_power
+        return attributes
 
     async def async_turn_on(self, **kwargs):
         """Enable curtailment."""
-        # Get power limit from number entity
-        number_entity_id = f"number.{self._entry.data['name'].lower().replace(' ', '_')}_power_limit"
-        limit = self.hass.states.get(number_entity_id)
-        limit_value = int(float(limit.state)) if limit else 50
-        
-        await self.hass.async_add_executor_job(
-            self._client.set_power_limit, limit_value
-        )
-        self._is_on = True
+        self.coordinator.control.curtailment = True
+        await self._controller.async_apply()
         self.async_write_ha_state()
-        await self.coordinator.async_request_refresh()
 
     async def async_turn_off(self, **kwargs):
         """Disable curtailment (set to 100%)."""
-        await self.hass.async_add_executor_job(self._client.set_power_limit, 100)
-        self._is_on = False
+        self.coordinator.control.curtailment = False
+        await self._controller.async_apply()
         self.async_write_ha_state()
-        await self.coordinator.async_request_refresh()
\ No newline at end of file
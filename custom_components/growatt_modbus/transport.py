@@ -0,0 +1,610 @@
+"""Modbus transports for Growatt inverters.
+
+TcpTransport speaks Modbus TCP through pymodbus, PipelinedTcpTransport
+keeps several Modbus TCP transactions in flight on one socket. The RTU transports build
+and parse RTU frames themselves, either sent raw over a TCP socket to a
+serial gateway or written to a local RS485 adapter. Responses are read by
+their exact length, derived from the function code, so a request completes
+as soon as its last byte arrives instead of after an idle timeout.
+"""
+import abc
+import asyncio
+import logging
+import os
+import struct
+import time
+from collections import deque
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusException, ModbusIOException
+
+from .const import (
+    DEFAULT_BAUDRATE,
+    TRANSPORT_RTU_OVER_TCP,
+    TRANSPORT_SERIAL,
+    TRANSPORT_TCP,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Function codes
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+# How long the line must stay quiet before a flush is considered complete
+FLUSH_IDLE = 0.05
+
+# Pipelining is given up once more than half of the last PIPELINE_WINDOW
+# requests sent while others were in flight went unanswered
+PIPELINE_WINDOW = 16
+
+
+def _crc_table() -> tuple[int, ...]:
+    """Build the lookup table of the Modbus CRC-16 (polynomial 0xA001)."""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC_TABLE = _crc_table()
+
+
+def crc16(data: bytes) -> int:
+    """Return the Modbus RTU CRC of a frame."""
+    crc = 0xFFFF
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def frame_silence(baudrate: int) -> float:
+    """Return the 3.5 character silence required between RTU frames.
+
+    A character is 11 bits on the wire. Above 19200 baud the specification
+    fixes the silence at 1.75 ms.
+    """
+    if baudrate > 19200:
+        return 0.00175
+    return 3.5 * 11 / baudrate
+
+
+class Transport(abc.ABC):
+    """A link to a Modbus device executing one request at a time.
+
+    Transports with ``pipelined`` set accept further requests while earlier
+    ones are still waiting for their responses. ``frame_overhead`` is the
+    number of bytes the framing adds to each PDU.
+    """
+
+    pipelined = False
+    frame_overhead: int
+
+    @property
+    @abc.abstractmethod
+    def connected(self) -> bool:
+        """Return True if the link is open."""
+
+    @abc.abstractmethod
+    async def connect(self) -> None:
+        """Open the link, raising ConnectionException on failure."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Close the link."""
+
+    @abc.abstractmethod
+    async def read_registers(
+        self, register_type: str, address: int, count: int, slave: int
+    ) -> list[int]:
+        """Read a span of input or holding registers from a slave."""
+
+    @abc.abstractmethod
+    async def write_register(self, address: int, value: int, slave: int) -> bool:
+        """Write a single holding register of a slave."""
+
+    @abc.abstractmethod
+    async def write_registers(self, address: int, values: list[int], slave: int) -> bool:
+        """Write consecutive holding registers of a slave in one request."""
+
+
+class TcpTransport(Transport):
+    """Modbus TCP through pymodbus."""
+
+    # MBAP header
+    frame_overhead = 7
+
+    def __init__(self, host: str, port: int, timeout: float):
+        """Initialize the transport."""
+        self.host = host
+        self.port = port
+        # Retries are left to SharedConnection, stale responses to earlier
+        # requests are dropped by their transaction id
+        self._client = AsyncModbusTcpClient(
+            host,
+            port=port,
+            timeout=timeout,
+            retries=0,
+        )
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the socket is open."""
+        return self._client.connected
+
+    async def connect(self) -> None:
+        """Connect to the gateway."""
+        if not await self._client.connect():
+            raise ConnectionException(
+                f"Failed to connect to inverter at {self.host}:{self.port}"
+            )
+
+    def close(self) -> None:
+        """Close the socket."""
+        if self._client.connected:
+            self._client.close()
+
+    async def read_registers(
+        self, register_type: str, address: int, count: int, slave: int
+    ) -> list[int]:
+        """Read a span of input or holding registers from a slave."""
+        if register_type == "input":
+            read = self._client.read_input_registers
+        else:  # holding
+            read = self._client.read_holding_registers
+        result = await read(address, count=count, device_id=slave)
+
+        if result.isError():
+            raise ModbusException(f"Error reading register {address}")
+
+        return result.registers
+
+    async def write_register(self, address: int, value: int, slave: int) -> bool:
+        """Write a single holding register of a slave."""
+        result = await self._client.write_register(address, value, device_id=slave)
+        return not result.isError()
+
+    async def write_registers(self, address: int, values: list[int], slave: int) -> bool:
+        """Write consecutive holding registers of a slave in one request."""
+        result = await self._client.write_registers(address, values, device_id=slave)
+        return not result.isError()
+
+
+class PduTransport(Transport):
+    """A transport sending Modbus PDUs it builds and parses itself."""
+
+    @abc.abstractmethod
+    async def _request(self, slave: int, request: bytes) -> bytes:
+        """Send a request PDU to a slave and return the response PDU."""
+
+    async def read_registers(
+        self, register_type: str, address: int, count: int, slave: int
+    ) -> list[int]:
+        """Read a span of input or holding registers from a slave."""
+        if register_type == "input":
+            function = READ_INPUT_REGISTERS
+        else:  # holding
+            function = READ_HOLDING_REGISTERS
+        response = await self._request(
+            slave, struct.pack(">BHH", function, address, count)
+        )
+
+        if response[0] & 0x80 or response[1] != 2 * count:
+            raise ModbusException(f"Error reading register {address}")
+
+        return list(struct.unpack_from(f">{count}H", response, 2))
+
+    async def write_register(self, address: int, value: int, slave: int) -> bool:
+        """Write a single holding register of a slave."""
+        request = struct.pack(">BHH", WRITE_SINGLE_REGISTER, address, value)
+        return await self._request(slave, request) == request
+
+    async def write_registers(self, address: int, values: list[int], slave: int) -> bool:
+        """Write consecutive holding registers of a slave in one request."""
+        count = len(values)
+        request = struct.pack(
+            f">BHHB{count}H", WRITE_MULTIPLE_REGISTERS, address, count, 2 * count, *values
+        )
+        return await self._request(slave, request) == request[:5]
+
+
+class RtuTransport(PduTransport):
+    """Modbus RTU framing over a byte stream.
+
+    A new request is sent as soon as the inter-frame silence has passed
+    since the previous frame ended, without any further padding. After a
+    timeout or a corrupt frame the late or remaining bytes are flushed
+    before the next request, so they are not mistaken for its response.
+    """
+
+    # Slave address and CRC
+    frame_overhead = 3
+
+    def __init__(self, timeout: float, silence: float):
+        """Initialize the transport."""
+        self.timeout = timeout
+        self.silence = silence
+        self._reader: asyncio.StreamReader | None = None
+        self._last_frame = 0.0
+        self._stale = False
+
+    @abc.abstractmethod
+    async def _send(self, frame: bytes) -> None:
+        """Write a frame to the stream."""
+
+    async def _flush(self) -> None:
+        """Discard bytes until the line has been idle for a moment."""
+        discarded = 0
+        while True:
+            try:
+                data = await asyncio.wait_for(
+                    self._reader.read(256), max(self.silence, FLUSH_IDLE)
+                )
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                self.close()
+                raise ConnectionException("Connection closed by the gateway")
+            discarded += len(data)
+        self._stale = False
+        if discarded:
+            _LOGGER.debug(f"Discarded {discarded} stale bytes")
+
+    async def _read_frame(self) -> bytes:
+        """Read one response frame, using the function code for its length."""
+        reader = self._reader
+        header = await reader.readexactly(2)
+        function = header[1]
+        if function & 0x80:
+            # Exception code and CRC
+            rest = await reader.readexactly(3)
+        elif function in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+            size = await reader.readexactly(1)
+            rest = size + await reader.readexactly(size[0] + 2)
+        else:
+            # Address, value or count, and CRC
+            rest = await reader.readexactly(6)
+        return header + rest
+
+    async def _request(self, slave: int, request: bytes) -> bytes:
+        """Send a request PDU to a slave and return the response PDU."""
+        if not self.connected:
+            raise ConnectionException("Not connected")
+        if self._stale:
+            await self._flush()
+
+        wait = self._last_frame + self.silence - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        frame = bytes((slave,)) + request
+        await self._send(frame + crc16(frame).to_bytes(2, "little"))
+        try:
+            response = await asyncio.wait_for(self._read_frame(), self.timeout)
+        except asyncio.TimeoutError as err:
+            self._stale = True
+            raise ModbusIOException(f"No response from slave {slave}") from err
+        except asyncio.IncompleteReadError as err:
+            self.close()
+            raise ConnectionException("Connection closed by the gateway") from err
+        except asyncio.CancelledError:
+            # Timed out by the caller, the response may still arrive
+            self._stale = True
+            raise
+        finally:
+            self._last_frame = time.monotonic()
+
+        if crc16(response[:-2]) != int.from_bytes(response[-2:], "little"):
+            self._stale = True
+            raise ModbusIOException(f"CRC error in response from slave {slave}")
+        if response[0] != slave or response[1] & 0x7F != request[0]:
+            self._stale = True
+            raise ModbusIOException(f"Unexpected response to slave {slave}")
+        return response[1:-2]
+
+
+class RtuOverTcpTransport(RtuTransport):
+    """Raw RTU frames over a TCP socket to a serial gateway.
+
+    Requests are paced by the inter-frame silence of the gateway's baud
+    rate, so its buffer does not run frames together. Without a baud rate
+    the gateway is left to time the RS485 line itself.
+    """
+
+    def __init__(
+        self, host: str, port: int, timeout: float, baudrate: int | None = None
+    ):
+        """Initialize the transport."""
+        super().__init__(timeout, frame_silence(baudrate) if baudrate else 0.0)
+        self.host = host
+        self.port = port
+        self._writer: asyncio.StreamWriter | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the socket is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> None:
+        """Connect to the gateway."""
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as err:
+            raise ConnectionException(
+                f"Failed to connect to inverter at {self.host}:{self.port}"
+            ) from err
+        self._stale = False
+
+    def close(self) -> None:
+        """Close the socket."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _send(self, frame: bytes) -> None:
+        """Write a frame to the socket."""
+        self._writer.write(frame)
+        await self._writer.drain()
+
+
+class SerialRtuTransport(RtuTransport):
+    """RTU frames on a local serial port, e.g. a USB RS485 adapter.
+
+    The port is driven through termios in raw 8N1 mode, so no serial
+    library is needed. Growatt inverters default to 9600 baud.
+    """
+
+    def __init__(self, device: str, timeout: float, baudrate: int = DEFAULT_BAUDRATE):
+        """Initialize the transport."""
+        super().__init__(timeout, frame_silence(baudrate))
+        self.device = device
+        self.baudrate = baudrate
+        self._fd: int | None = None
+        self._read_transport: asyncio.ReadTransport | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the port is open."""
+        return self._fd is not None
+
+    async def connect(self) -> None:
+        """Open and configure the serial port."""
+        import termios  # POSIX only
+
+        loop = asyncio.get_running_loop()
+        try:
+            fd = os.open(self.device, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        except OSError as err:
+            raise ConnectionException(f"Failed to open {self.device}: {err}") from err
+
+        try:
+            speed = getattr(termios, f"B{self.baudrate}")
+            attrs = termios.tcgetattr(fd)
+            attrs[0] = 0  # iflag
+            attrs[1] = 0  # oflag
+            attrs[2] = termios.CS8 | termios.CREAD | termios.CLOCAL  # cflag
+            attrs[3] = 0  # lflag
+            attrs[4] = attrs[5] = speed
+            attrs[6][termios.VMIN] = 0
+            attrs[6][termios.VTIME] = 0
+            termios.tcsetattr(fd, termios.TCSANOW, attrs)
+            termios.tcflush(fd, termios.TCIOFLUSH)
+
+            self._reader = asyncio.StreamReader()
+            self._read_transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(self._reader),
+                os.fdopen(os.dup(fd), "rb", buffering=0),
+            )
+        except (AttributeError, OSError, termios.error) as err:
+            os.close(fd)
+            raise ConnectionException(
+                f"Failed to configure {self.device} at {self.baudrate} baud: {err}"
+            ) from err
+
+        self._fd = fd
+        self._stale = False
+
+    def close(self) -> None:
+        """Close the serial port."""
+        if self._read_transport is not None:
+            self._read_transport.close()
+            self._read_transport = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    async def _flush(self) -> None:
+        """Drop bytes buffered by the driver as well as late ones."""
+        import termios  # POSIX only
+
+        termios.tcflush(self._fd, termios.TCIFLUSH)
+        await super()._flush()
+
+    async def _send(self, frame: bytes) -> None:
+        """Write a frame to the port, waiting while its buffer is full."""
+        loop = asyncio.get_running_loop()
+        view = memoryview(frame)
+        while view:
+            try:
+                view = view[os.write(self._fd, view):]
+            except BlockingIOError:
+                pass
+            if view:
+                writable = loop.create_future()
+                loop.add_writer(self._fd, writable.set_result, None)
+                try:
+                    await writable
+                finally:
+                    loop.remove_writer(self._fd)
+
+
+class PipelinedTcpTransport(PduTransport):
+    """Modbus TCP with several transactions in flight on one socket.
+
+    Requests are written as soon as they are made and a reader task hands
+    each response to the request with its transaction id. Gateways that
+    cannot handle concurrent transactions give themselves away by answering
+    with unknown transaction ids, by closing the socket, or by leaving most
+    requests sent while others were in flight unanswered; the transport
+    then stops pipelining and runs requests in lock-step.
+    """
+
+    # MBAP header
+    frame_overhead = 7
+
+    def __init__(self, host: str, port: int, timeout: float):
+        """Initialize the transport."""
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.pipelined = True
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._receiver: asyncio.Task | None = None
+        self._pending: dict[int, tuple[int, int, asyncio.Future]] = {}
+        # Transactions given up on, whose responses may still arrive
+        self._abandoned: set[int] = set()
+        self._transaction = 0
+        # Whether recent requests sent alongside others were answered
+        self._outcomes: deque[bool] = deque(maxlen=PIPELINE_WINDOW)
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the socket is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> None:
+        """Connect to the gateway and start reading responses."""
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as err:
+            raise ConnectionException(
+                f"Failed to connect to inverter at {self.host}:{self.port}"
+            ) from err
+        self._abandoned.clear()
+        self._receiver = asyncio.get_running_loop().create_task(
+            self._receive(self._reader)
+        )
+
+    def close(self) -> None:
+        """Close the socket, failing the requests in flight."""
+        if self._receiver is not None:
+            self._receiver.cancel()
+            self._receiver = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        pending, self._pending = self._pending, {}
+        for _, _, future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionException("Connection closed"))
+
+    def _fall_back(self, reason: str) -> None:
+        """Stop pipelining for good."""
+        if self.pipelined:
+            _LOGGER.warning(
+                f"{self.host}:{self.port} does not handle pipelined requests "
+                f"({reason}), sending them one at a time"
+            )
+            self.pipelined = False
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        """Dispatch responses to their requests until the socket closes."""
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction, _, length, unit = struct.unpack(">HHHB", header)
+                pdu = await reader.readexactly(length - 1)
+                request = self._pending.pop(transaction, None)
+                if request is None:
+                    if transaction in self._abandoned:
+                        self._abandoned.discard(transaction)
+                    else:
+                        self._fall_back(f"unknown transaction id {transaction}")
+                    continue
+                slave, function, future = request
+                if future.done():
+                    continue
+                if unit != slave or pdu[0] & 0x7F != function:
+                    self._fall_back(f"mismatched response to transaction {transaction}")
+                    future.set_exception(
+                        ModbusIOException(f"Unexpected response to slave {slave}")
+                    )
+                else:
+                    future.set_result(pdu)
+        except (asyncio.IncompleteReadError, ConnectionError) as err:
+            if len(self._pending) > 1:
+                self._fall_back("connection closed with requests in flight")
+            self._receiver = None
+            self.close()
+            _LOGGER.debug(f"Connection to {self.host}:{self.port} closed: {err}")
+
+    async def _request(self, slave: int, request: bytes) -> bytes:
+        """Send a request PDU to a slave and return the response PDU."""
+        if not self.connected:
+            raise ConnectionException("Not connected")
+        self._transaction = self._transaction % 0xFFFF + 1
+        transaction = self._transaction
+        concurrent = bool(self._pending)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[transaction] = (slave, request[0], future)
+
+        self._writer.write(
+            struct.pack(">HHHB", transaction, 0, len(request) + 1, slave) + request
+        )
+        try:
+            await self._writer.drain()
+            response = await asyncio.wait_for(future, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as err:
+            if self._pending.pop(transaction, None) is not None:
+                self._abandoned.add(transaction)
+            if concurrent:
+                self._record_outcome(False)
+            if isinstance(err, asyncio.CancelledError):
+                raise
+            raise ModbusIOException(f"No response from slave {slave}") from err
+        except ConnectionError as err:
+            self._pending.pop(transaction, None)
+            self.close()
+            raise ConnectionException(f"Connection to {self.host} lost") from err
+
+        if concurrent:
+            self._record_outcome(True)
+        return response
+
+    def _record_outcome(self, answered: bool) -> None:
+        """Track concurrent requests, giving up pipelining if most are lost."""
+        outcomes = self._outcomes
+        outcomes.append(answered)
+        if len(outcomes) >= PIPELINE_WINDOW // 2 and outcomes.count(False) * 2 > len(outcomes):
+            self._fall_back("concurrent requests went unanswered")
+
+
+def create_transport(
+    transport: str,
+    host: str,
+    port: int,
+    timeout: float,
+    baudrate: int = DEFAULT_BAUDRATE,
+    pipelining: bool = False,
+) -> Transport:
+    """Create a transport, for serial ports host is the device path."""
+    if transport == TRANSPORT_TCP and pipelining:
+        return PipelinedTcpTransport(host, port, timeout)
+    if transport == TRANSPORT_TCP:
+        return TcpTransport(host, port, timeout)
+    if transport == TRANSPORT_RTU_OVER_TCP:
+        return RtuOverTcpTransport(host, port, timeout, baudrate)
+    if transport == TRANSPORT_SERIAL:
+        return SerialRtuTransport(host, timeout, baudrate)
+    raise ValueError(f"Unknown transport: {transport}")
@@ -0,0 +1,105 @@
+"""Debounced write queue for Growatt holding registers."""
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from .const import DEFAULT_WRITE_DELAY, MAX_WRITE_DELAY
+from .holding_cache import HoldingCache
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def contiguous_runs(values: dict[int, int]) -> list[tuple[int, list[int]]]:
+    """Split register values into runs of consecutive addresses."""
+    runs: list[tuple[int, list[int]]] = []
+    for address in sorted(values):
+        if runs and runs[-1][0] + len(runs[-1][1]) == address:
+            runs[-1][1].append(values[address])
+        else:
+            runs.append((address, [values[address]]))
+    return runs
+
+
+class WriteQueue:
+    """Coalesce holding register writes before sending them.
+
+    Values queued within ``delay`` of each other are merged so only the
+    latest value per register is written, but never later than
+    ``max_delay`` after the first queued value. Values the cache already
+    holds are skipped, and consecutive registers go out as one
+    write-multiple request.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[int, list[int]], Awaitable[bool]],
+        cache: HoldingCache | None = None,
+        delay: float = DEFAULT_WRITE_DELAY,
+        max_delay: float = MAX_WRITE_DELAY,
+    ):
+        """Initialize the queue with a coroutine writing a run of registers."""
+        self._write = write
+        self._delay = delay
+        self._max_delay = max_delay
+        self._pending: dict[int, int] = {}
+        self._waiters: list[asyncio.Future] = []
+        self._first_queued = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task | None = None
+        self.cache = cache if cache is not None else HoldingCache()
+
+    async def write(self, values: dict[int, int]) -> bool:
+        """Queue register values and wait until they are written."""
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            self._first_queued = time.monotonic()
+        self._pending.update(values)
+
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+
+        if self._timer is not None:
+            self._timer.cancel()
+        remaining = self._first_queued + self._max_delay - time.monotonic()
+        self._timer = loop.call_later(
+            max(0.0, min(self._delay, remaining)), self._start_flush
+        )
+        return await waiter
+
+    def _start_flush(self) -> None:
+        """Hand the pending values to a flush task."""
+        self._timer = None
+        self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self) -> None:
+        """Write the pending values and resolve everyone waiting on them."""
+        pending, waiters = self._pending, self._waiters
+        self._pending, self._waiters = {}, []
+
+        changed = {
+            address: value
+            for address, value in pending.items()
+            if self.cache.get(address, 1) != [value]
+        }
+
+        success = True
+        try:
+            for address, values in contiguous_runs(changed):
+                if await self._write(address, values):
+                    self.cache.store(address, values)
+                else:
+                    success = False
+        except Exception as err:  # noqa: BLE001 - handed to every waiter
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(err)
+            return
+
+        if len(changed) < len(pending):
+            _LOGGER.debug(
+                f"Skipped {len(pending) - len(changed)} unchanged register write(s)"
+            )
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(success)
@@ -0,0 +1,12 @@
+"""Shared setup of the Growatt Modbus tests.
+
+The integration package imports Home Assistant, which most modules do not
+need. Like the tools, the tests import those modules as ``growatt_modbus``
+and talk to the simulator of tools/simulator.py instead of an inverter.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+
+import integration  # noqa: E402,F401
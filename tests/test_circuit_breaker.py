@@ -0,0 +1,59 @@
+"""Tests of the circuit breaker."""
+import pytest
+from pymodbus.exceptions import ConnectionException, ModbusException, ModbusIOException
+
+from growatt_modbus.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_OPEN,
+    CircuitBreaker,
+    InverterOfflineError,
+    is_connection_error,
+)
+
+
+def test_closed_breaker_lets_requests_through():
+    breaker = CircuitBreaker()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.check() is False
+
+
+def test_failure_opens_the_breaker():
+    breaker = CircuitBreaker(backoff=60)
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(InverterOfflineError):
+        breaker.check()
+    assert breaker.retry_in == pytest.approx(60, abs=1)
+
+
+def test_probe_after_the_backoff():
+    breaker = CircuitBreaker(backoff=0)
+    breaker.record_failure()
+    assert breaker.check() is True
+
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 0
+    assert breaker.check() is False
+
+
+def test_failed_probes_double_the_backoff_up_to_the_limit():
+    breaker = CircuitBreaker(backoff=10, max_backoff=25)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.retry_in == pytest.approx(20, abs=1)
+    breaker.record_failure()
+    assert breaker.retry_in == pytest.approx(25, abs=1)
+
+    # Success starts over from the initial backoff
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.retry_in == pytest.approx(10, abs=1)
+
+
+def test_connection_errors():
+    assert is_connection_error(ConnectionException("closed"))
+    assert is_connection_error(ModbusIOException("no response"))
+    assert is_connection_error(OSError("unreachable"))
+    assert not is_connection_error(ModbusException("illegal address"))
+    assert is_connection_error(InverterOfflineError("offline"))
@@ -0,0 +1,68 @@
+"""Tests of the coordinator, run with pytest-homeassistant-custom-component."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.util import dt as dt_util  # noqa: E402
+from pytest_homeassistant_custom_component.common import MockConfigEntry  # noqa: E402
+
+from custom_components.growatt_modbus import GrowattDataUpdateCoordinator  # noqa: E402
+from custom_components.growatt_modbus.const import DOMAIN  # noqa: E402
+from custom_components.growatt_modbus.modbus_client import (  # noqa: E402
+    AsyncGrowattModbusClient,
+)
+from simulator import InverterSimulator  # noqa: E402
+
+pytestmark = [
+    pytest.mark.asyncio,
+    # The snapshot store saves on a timer
+    pytest.mark.parametrize("expected_lingering_timers", [True]),
+]
+
+
+async def test_wake_rewrites_unchanged_values(hass):
+    """Entities are written after waking even if no value moved."""
+    simulator = InverterSimulator()
+    # Before dawn the inverter is in standby without PV power
+    simulator.set_value("status", 0)
+    for key in ("pv1_current", "pv2_current"):
+        simulator.set_value(key, 0)
+    await simulator.start()
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"name": "Test", "host": "127.0.0.1", "port": simulator.port, "slave": 1},
+    )
+    entry.add_to_hass(hass)
+    client = AsyncGrowattModbusClient("127.0.0.1", simulator.port, 1)
+    coordinator = GrowattDataUpdateCoordinator(hass, client, entry)
+    sunrise = dt_util.utcnow() + timedelta(hours=2)
+
+    try:
+        with (
+            patch("custom_components.growatt_modbus.is_up", return_value=False),
+            patch(
+                "custom_components.growatt_modbus.get_astral_event_next",
+                return_value=sunrise,
+            ),
+        ):
+            await coordinator.async_refresh()
+        assert coordinator.sleeping
+
+        # Wake time has come, the values are still those before sleeping
+        coordinator._wake_at = dt_util.utcnow() - timedelta(seconds=1)
+        with patch("custom_components.growatt_modbus.is_up", return_value=True):
+            await coordinator.async_refresh()
+            assert not coordinator.sleeping
+            assert coordinator.data["status"] == 0
+            assert coordinator.has_changed("status")
+
+            # Only the first poll after waking writes everything
+            await coordinator.async_refresh()
+            assert not coordinator.has_changed("status")
+    finally:
+        await client.close()
+        await simulator.stop()
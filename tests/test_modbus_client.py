@@ -0,0 +1,86 @@
+"""Polls of the simulator through every transport."""
+import asyncio
+import os
+
+import pytest
+
+from growatt_modbus.connection import _CONNECTIONS
+from growatt_modbus.const import TRANSPORT_RTU_OVER_TCP, TRANSPORT_SERIAL, TRANSPORT_TCP
+from growatt_modbus.modbus_client import AsyncGrowattModbusClient
+from simulator import DEFAULT_VALUES, InverterSimulator, SimulatorConfig
+
+TRANSPORTS = [
+    pytest.param(TRANSPORT_TCP, False, id="tcp"),
+    pytest.param(TRANSPORT_TCP, True, id="tcp-pipelined"),
+    pytest.param(TRANSPORT_RTU_OVER_TCP, False, id="rtu-over-tcp"),
+    pytest.param(
+        TRANSPORT_SERIAL,
+        False,
+        id="serial",
+        marks=pytest.mark.skipif(os.name != "posix", reason="needs a pseudo terminal"),
+    ),
+]
+
+
+async def _poll(transport: str, pipelining: bool, profile: str = "min"):
+    """Poll a simulated inverter twice, return the data and the client."""
+    framing = "tcp" if transport == TRANSPORT_TCP else "rtu"
+    simulator = InverterSimulator(SimulatorConfig(framing=framing, profile=profile))
+    if transport == TRANSPORT_SERIAL:
+        host, port = await simulator.start_pty(), 0
+    else:
+        await simulator.start()
+        host, port = "127.0.0.1", simulator.port
+    client = AsyncGrowattModbusClient(
+        host, port, 1, timeout=2, profile=profile, transport=transport, pipelining=pipelining
+    )
+    try:
+        await client.read_all_data()
+        # The second poll runs pipelined once a round trip was measured
+        data = await client.read_all_data()
+        identity = await client.read_identity()
+    finally:
+        await client.close()
+        await simulator.stop()
+    return data, identity, client
+
+
+@pytest.mark.parametrize(("transport", "pipelining"), TRANSPORTS)
+def test_poll(transport, pipelining):
+    data, identity, client = asyncio.run(_poll(transport, pipelining))
+
+    for key, value in DEFAULT_VALUES.items():
+        if key in client.registers:
+            assert data[key] == pytest.approx(value, abs=0.06), key
+    assert data["pv_power"] == pytest.approx(352.4 * 6.2 + 348.9 * 5.8, rel=1e-3)
+    assert identity[0] == "SIM0000001"
+    assert client.stats.failed_requests == 0
+    assert not _CONNECTIONS
+
+
+def test_poll_bytes_follow_the_framing():
+    tcp = asyncio.run(_poll(TRANSPORT_TCP, False))[2].stats
+    rtu = asyncio.run(_poll(TRANSPORT_RTU_OVER_TCP, False))[2].stats
+    assert tcp.requests == rtu.requests
+    # Four bytes less framing per frame, two frames per request
+    assert tcp.bytes - rtu.bytes == 8 * tcp.requests
+
+
+def test_power_limit_write():
+    async def main():
+        simulator = InverterSimulator()
+        await simulator.start()
+        client = AsyncGrowattModbusClient("127.0.0.1", simulator.port, 1)
+        try:
+            assert await client.set_power_limit(40)
+            data = await client.read_all_data()
+        finally:
+            await client.close()
+            await simulator.stop()
+        address = client.registers["power_limit"]["address"]
+        return data, simulator.registers[1]["holding"][address]
+
+    data, written = asyncio.run(main())
+    assert written == 40
+    # Served from the write-through cache
+    assert data["power_limit"] == 40
@@ -0,0 +1,87 @@
+"""Tests of the read planning and block decoding."""
+from growatt_modbus.const import DEFAULT_SCAN_INTERVAL
+from growatt_modbus.read_plan import (
+    BlockDecoder,
+    ReadBlock,
+    build_read_plan,
+    compile_decode_plan,
+)
+
+
+def _input(address, data_type="uint16", **extra):
+    return {"address": address, "type": "input", "data_type": data_type, **extra}
+
+
+def test_registers_within_gap_share_a_block():
+    registers = {"a": _input(0), "b": _input(5), "c": _input(20)}
+    plan = build_read_plan(registers, max_gap=4)
+    assert [(block.address, block.count, block.keys) for block in plan] == [
+        (0, 6, ("a", "b")),
+        (20, 1, ("c",)),
+    ]
+
+
+def test_gap_limit_is_inclusive():
+    registers = {"a": _input(0), "b": _input(5)}
+    assert len(build_read_plan(registers, max_gap=4)) == 1
+    assert len(build_read_plan(registers, max_gap=3)) == 2
+
+
+def test_blocks_never_exceed_the_request_limit():
+    registers = {f"r{n}": _input(n) for n in range(300)}
+    plan = build_read_plan(registers, max_gap=10)
+    assert [block.count for block in plan] == [125, 125, 50]
+    assert sum(len(block.keys) for block in plan) == 300
+
+
+def test_32_bit_value_counts_two_registers():
+    registers = {f"r{n}": _input(n) for n in range(123)}
+    registers["wide"] = _input(123, "uint32")
+    assert [block.count for block in build_read_plan(registers)] == [125]
+
+    registers = {f"r{n}": _input(n) for n in range(124)}
+    registers["wide"] = _input(124, "uint32")
+    plan = build_read_plan(registers)
+    assert [(block.address, block.count) for block in plan] == [(0, 124), (124, 2)]
+
+
+def test_types_and_intervals_are_planned_apart():
+    registers = {
+        "a": _input(0),
+        "b": _input(1, interval=30),
+        "c": {"address": 2, "type": "holding", "data_type": "uint16"},
+    }
+    plan = build_read_plan(registers)
+    assert {(block.register_type, block.interval, block.keys) for block in plan} == {
+        ("input", DEFAULT_SCAN_INTERVAL, ("a",)),
+        ("input", 30, ("b",)),
+        ("holding", DEFAULT_SCAN_INTERVAL, ("c",)),
+    }
+
+
+def test_decode_signed_and_unsigned_values():
+    registers = {
+        "u16": _input(0, scale=0.1),
+        "s16": _input(1, "int16"),
+        "u32": _input(2, "uint32", scale=0.1),
+        "s32": _input(4, "int32"),
+        "s32_positive": _input(6, "int32"),
+    }
+    (decoder,) = compile_decode_plan(registers)
+    data = {}
+    decoder.decode_registers(
+        [1234, 0xFFFE, 0x0001, 0x0002, 0xFFFF, 0xFF38, 0x0000, 0x0064], data
+    )
+    assert data["u16"] == 1234 * 0.1
+    assert data["s16"] == -2
+    assert data["u32"] == 0x00010002 * 0.1
+    assert data["s32"] == -200
+    assert data["s32_positive"] == 100
+
+
+def test_decode_overlapping_values():
+    registers = {"high": _input(0), "both": _input(0, "uint32"), "low": _input(1)}
+    decoder = BlockDecoder(ReadBlock("input", 0, 2, ("both", "high", "low")), registers)
+    data = {}
+    decoder.decode_registers([0x0001, 0x0002], data)
+    assert data == {"both": 0x00010002, "high": 1, "low": 2}
@@ -0,0 +1,47 @@
+"""Tests of the rolling sample history."""
+from growatt_modbus.ring_buffer import RingBuffer, SampleHistory
+
+
+def test_statistics_of_an_empty_buffer():
+    assert RingBuffer(60, 4).statistics() == {
+        "count": 0, "min": None, "max": None, "mean": None
+    }
+
+
+def test_full_ring_evicts_the_oldest_sample():
+    buffer = RingBuffer(60, 3)
+    for second, value in enumerate((5, 1, 3, 4)):
+        buffer.append(second, value)
+    assert len(buffer) == 3
+    assert buffer.statistics() == {"count": 3, "min": 1, "max": 4, "mean": 8 / 3}
+
+
+def test_min_and_max_follow_evictions():
+    buffer = RingBuffer(60, 3)
+    for second, value in enumerate((1, 9, 5, 6, 7)):
+        buffer.append(second, value)
+    stats = buffer.statistics()
+    assert (stats["min"], stats["max"]) == (5, 7)
+
+
+def test_samples_leave_the_window():
+    buffer = RingBuffer(10, 100)
+    buffer.append(0, 100)
+    buffer.append(5, 1)
+    buffer.append(12, 2)
+    stats = buffer.statistics()
+    assert (stats["count"], stats["min"], stats["max"]) == (2, 1, 2)
+
+    buffer.expire(30)
+    assert len(buffer) == 0
+    buffer.append(31, 4)
+    assert buffer.statistics()["mean"] == 4
+
+
+def test_history_skips_missing_values():
+    history = SampleHistory(60, {"a": 2})
+    history.record(0, {"a": 1.5, "b": None}, ["a", "b"])
+    history.record(2, {"a": 2.5}, ["a"])
+    assert history.statistics("a", 2)["mean"] == 2
+    assert history.statistics("b", 2) is None
+    assert set(history.keys()) == {"a"}
@@ -0,0 +1,47 @@
+"""Tests of the round-trip time estimator."""
+import pytest
+
+from growatt_modbus.rtt import RttEstimator
+
+
+def test_timeout_is_the_ceiling_until_sampled():
+    rtt = RttEstimator(0.2, 5)
+    assert rtt.rto == 5
+
+
+def test_first_sample_sets_the_estimate():
+    rtt = RttEstimator(0.2, 5)
+    rtt.sample(0.1)
+    assert rtt.srtt == 0.1
+    assert rtt.rttvar == 0.05
+    # 0.1 + 4 * 0.05, still above the floor
+    assert rtt.rto == pytest.approx(0.3)
+
+
+def test_timeout_stays_within_floor_and_ceiling():
+    rtt = RttEstimator(0.2, 1)
+    rtt.sample(0.01)
+    assert rtt.rto == 0.2
+    rtt.sample(3)
+    assert rtt.rto == 1
+
+
+def test_smoothing_follows_rfc_6298():
+    rtt = RttEstimator(0.0, 10)
+    rtt.sample(0.1)
+    rtt.sample(0.2)
+    assert rtt.rttvar == pytest.approx(0.75 * 0.05 + 0.25 * 0.1)
+    assert rtt.srtt == pytest.approx(0.875 * 0.1 + 0.125 * 0.2)
+
+
+def test_backoff_doubles_once_for_simultaneous_timeouts():
+    rtt = RttEstimator(0.2, 5)
+    rtt.sample(0.1)
+    timeout = rtt.rto
+    rtt.backoff(timeout)
+    rtt.backoff(timeout)
+    assert rtt.rto == pytest.approx(2 * timeout)
+    assert rtt.timeouts == 2
+
+    rtt.backoff(rtt.rto * 10)
+    assert rtt.rto == 5
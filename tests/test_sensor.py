@@ -0,0 +1,34 @@
+"""Tests of the sensor descriptions against the inverter profiles."""
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.growatt_modbus.profiles import PROFILES  # noqa: E402
+from custom_components.growatt_modbus.sensor import (  # noqa: E402
+    DEADBANDS,
+    REQUIRED_KEYS,
+    SENSOR_DESCRIPTIONS,
+)
+
+# Derived by the client from the PV strings
+DERIVED_KEYS = {"pv_power"}
+
+
+def test_every_description_has_a_register():
+    """A key no profile provides would never get an entity."""
+    known = DERIVED_KEYS.union(*(profile.registers for profile in PROFILES.values()))
+    missing = {description.key for description in SENSOR_DESCRIPTIONS} - known
+    assert not missing
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_required_keys_in_every_profile(profile):
+    """The read plan of every model must cover the values always read."""
+    assert REQUIRED_KEYS <= DERIVED_KEYS | set(PROFILES[profile].registers)
+
+
+def test_deadbands_from_descriptions():
+    """Only measurements are held back by a deadband."""
+    assert DEADBANDS["ac_power"] == 5
+    assert "status" not in DEADBANDS
+    assert {"status", "pv_power", "ac_power", "power_limit"} <= REQUIRED_KEYS
@@ -0,0 +1,54 @@
+"""Tests of the Modbus transports."""
+import asyncio
+
+import pytest
+from pymodbus.exceptions import ModbusIOException
+
+from growatt_modbus.transport import PipelinedTcpTransport, crc16, frame_silence
+from simulator import InverterSimulator, SimulatorConfig
+
+
+def test_crc16():
+    # Read 10 holding registers from slave 1, CRC C5 CD on the wire
+    assert crc16(bytes.fromhex("01030000000a")) == 0xCDC5
+    assert crc16(b"") == 0xFFFF
+
+
+def test_frame_silence():
+    assert frame_silence(9600) == pytest.approx(3.5 * 11 / 9600)
+    assert frame_silence(115200) == 0.00175
+
+
+async def _read_concurrently(config: SimulatorConfig, requests: int):
+    """Send concurrent reads on one pipelined socket, return the transport."""
+    simulator = InverterSimulator(config)
+    await simulator.start()
+    transport = PipelinedTcpTransport("127.0.0.1", simulator.port, 0.3)
+    try:
+        await transport.connect()
+        results = await asyncio.gather(
+            *(transport.read_registers("input", 0, 10, 1) for _ in range(requests)),
+            return_exceptions=True,
+        )
+    finally:
+        transport.close()
+        await simulator.stop()
+    return transport, results
+
+
+def test_pipelined_transactions():
+    transport, results = asyncio.run(
+        _read_concurrently(SimulatorConfig(pipeline=8, latency=0.02), 8)
+    )
+    assert transport.pipelined
+    assert all(isinstance(result, list) and len(result) == 10 for result in results)
+
+
+def test_pipelining_falls_back_when_requests_go_unanswered():
+    # A gateway serving one transaction at a time drops the others
+    transport, results = asyncio.run(
+        _read_concurrently(SimulatorConfig(pipeline=1, latency=0.05), 12)
+    )
+    assert not transport.pipelined
+    assert isinstance(results[0], list)
+    assert all(isinstance(result, ModbusIOException) for result in results[1:])
@@ -0,0 +1,101 @@
+"""Tests of the debounced write queue."""
+import asyncio
+
+from growatt_modbus.holding_cache import HoldingCache
+from growatt_modbus.write_queue import WriteQueue, contiguous_runs
+
+
+def test_contiguous_runs():
+    assert contiguous_runs({}) == []
+    assert contiguous_runs({3: 30, 1: 10, 2: 20, 7: 70}) == [
+        (1, [10, 20, 30]),
+        (7, [70]),
+    ]
+
+
+class _Inverter:
+    """Records the writes the queue sends."""
+
+    def __init__(self, result=True):
+        self.writes = []
+        self.result = result
+
+    async def write(self, address, values):
+        self.writes.append((address, values))
+        return self.result
+
+
+def test_rapid_writes_coalesce_into_one():
+    async def main():
+        inverter = _Inverter()
+        queue = WriteQueue(inverter.write, delay=0.01, max_delay=1)
+        results = await asyncio.gather(
+            queue.write({3: 1, 4: 10}),
+            queue.write({3: 1, 4: 20}),
+            queue.write({3: 1, 4: 30}),
+        )
+        return inverter.writes, results
+
+    writes, results = asyncio.run(main())
+    assert writes == [(3, [1, 30])]
+    assert results == [True, True, True]
+
+
+def test_cached_values_are_skipped():
+    async def main():
+        inverter = _Inverter()
+        cache = HoldingCache()
+        cache.store(3, [1])
+        queue = WriteQueue(inverter.write, cache, delay=0)
+        assert await queue.write({3: 1, 4: 50})
+        assert await queue.write({3: 1, 4: 50})
+        return inverter.writes
+
+    assert asyncio.run(main()) == [(4, [50])]
+
+
+def test_failed_write_is_not_cached():
+    async def main():
+        inverter = _Inverter(result=False)
+        queue = WriteQueue(inverter.write, delay=0)
+        assert not await queue.write({4: 50})
+        assert not await queue.write({4: 50})
+        return inverter.writes, queue.cache.get(4, 1)
+
+    writes, cached = asyncio.run(main())
+    assert writes == [(4, [50]), (4, [50])]
+    assert cached is None
+
+
+def test_errors_reach_every_waiter():
+    async def main():
+        async def write(address, values):
+            raise ConnectionError("gateway gone")
+
+        queue = WriteQueue(write, delay=0.01)
+        return await asyncio.gather(
+            queue.write({4: 1}), queue.write({4: 2}), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_max_delay_bounds_the_debounce():
+    async def main():
+        inverter = _Inverter()
+        queue = WriteQueue(inverter.write, delay=0.05, max_delay=0.1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        waiters = []
+        # Keep writing faster than the debounce delay
+        for value in range(10):
+            waiters.append(asyncio.ensure_future(queue.write({4: value})))
+            await asyncio.sleep(0.03)
+        await asyncio.gather(*waiters)
+        return inverter.writes, loop.time() - started
+
+    writes, _ = asyncio.run(main())
+    # Without the bound everything would go out in a single write at the end
+    assert len(writes) >= 2
+    assert writes[-1] == (4, [9])
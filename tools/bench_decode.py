@@ -0,0 +1,98 @@
+"""Micro-benchmark for decoding a poll of the register map.
+
+Compares the compiled decode plan against the per-key dictionary walk that
+read_all_data used before, on the same block responses. Besides the
+register map of every profile it runs a synthetic map the size of the
+larger Growatt families, where the per-key cost dominates.
+
+    python tools/bench_decode.py [--iterations N] [--repeat N]
+"""
+import argparse
+import timeit
+
+import integration  # noqa: F401
+
+from growatt_modbus.profiles import PROFILES
+from growatt_modbus.read_plan import build_read_plan, compile_decode_plan
+
+
+def synthetic_registers(count: int) -> dict[str, dict]:
+    """Build a dense input register map with a mix of data types."""
+    registers = {}
+    address = 0
+    for i in range(count):
+        data_type = ("uint16", "int16", "uint32", "uint16")[i % 4]
+        registers[f"value_{i}"] = {
+            "address": address,
+            "type": "input",
+            "data_type": data_type,
+            "scale": 0.1,
+        }
+        address += 3 if data_type == "uint32" else 1
+    return registers
+
+
+def decode_per_key(registers, blocks, responses, data):
+    """Decode blocks by walking the register map for every key."""
+    for block, values in zip(blocks, responses):
+        for key in block.keys:
+            reg_info = registers[key]
+            offset = reg_info["address"] - block.address
+            if reg_info["data_type"] == "uint32":
+                value = (values[offset] << 16) | values[offset + 1]
+            elif reg_info["data_type"] == "int16":
+                value = values[offset] - 0x10000 if values[offset] & 0x8000 else values[offset]
+            else:
+                value = values[offset]
+            if "scale" in reg_info:
+                value = value * reg_info["scale"]
+            data[key] = value
+
+
+def decode_plan(decoders, responses, data):
+    """Decode blocks with the compiled decode plan."""
+    for decoder, values in zip(decoders, responses):
+        decoder.decode_registers(values, data)
+
+
+def run(name: str, registers: dict[str, dict], iterations: int, repeat: int) -> None:
+    """Benchmark all decoders on one register map."""
+    blocks = build_read_plan(registers)
+    decoders = compile_decode_plan(registers)
+    responses = [
+        [(block.address + i) * 7919 % 65536 for i in range(block.count)]
+        for block in blocks
+    ]
+
+    expected, actual = {}, {}
+    decode_per_key(registers, blocks, responses, expected)
+    decode_plan(decoders, responses, actual)
+    assert expected == actual, "decode plan disagrees with per-key decoding"
+
+    print(f"{name}: {len(registers)} values in {len(blocks)} blocks")
+    cases = [
+        ("per-key dict walk", lambda: decode_per_key(registers, blocks, responses, {})),
+        ("decode plan (registers)", lambda: decode_plan(decoders, responses, {})),
+    ]
+    baseline = None
+    for case, func in cases:
+        best = min(timeit.repeat(func, number=iterations, repeat=repeat))
+        per_poll = best / iterations * 1e6
+        baseline = baseline or per_poll
+        print(f"  {case:<26} {per_poll:8.2f} us/poll  {baseline / per_poll:5.2f}x")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    for profile in PROFILES.values():
+        run(f"{profile.name} map", profile.registers, args.iterations, args.repeat)
+    run("synthetic map", synthetic_registers(120), args.iterations // 10, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
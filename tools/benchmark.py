@@ -0,0 +1,200 @@
+"""Polling benchmark for the Growatt Modbus client.
+
+Drives the client against the bundled simulator, or a real device, and
+reports throughput, round trips per poll and poll latency percentiles.
+
+    python tools/benchmark.py --polls 200 --latency 0.08 --jitter 0.04
+    python tools/benchmark.py --client sync --inverters 3
+    python tools/benchmark.py --strict --max-gap 0
+    python tools/benchmark.py --profile sph --latency 0.05
+    python tools/benchmark.py --transport serial --baudrate 9600
+    python tools/benchmark.py --pipelining --latency 0.1
+    python tools/benchmark.py --host 192.168.1.50 --port 502 --polls 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from pymodbus.exceptions import ModbusException
+
+import integration  # noqa: F401
+
+from growatt_modbus.const import (
+    DEFAULT_BAUDRATE,
+    DEFAULT_MAX_GAP,
+    DEFAULT_PROFILE,
+    PIPELINE_DEPTH,
+    TRANSPORT_RTU_OVER_TCP,
+    TRANSPORT_SERIAL,
+    TRANSPORT_TCP,
+)
+from growatt_modbus.profiles import PROFILES
+from growatt_modbus.modbus_client import AsyncGrowattModbusClient, GrowattModbusClient
+from simulator import InverterSimulator, SimulatorConfig
+
+
+def percentiles(samples: list[float]) -> tuple[float, float, float]:
+    """Return the p50, p95 and p99 of a list of samples."""
+    if len(samples) < 2:
+        value = samples[0] if samples else float("nan")
+        return value, value, value
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+async def poll_async(args: argparse.Namespace, host: str, port: int, slave: int) -> list[tuple[float, bool]]:
+    """Poll one inverter with the asyncio client."""
+    client = AsyncGrowattModbusClient(
+        host,
+        port,
+        slave,
+        args.timeout,
+        args.max_gap,
+        args.profile,
+        args.transport,
+        args.baudrate,
+        args.pipelining,
+    )
+    results = []
+    try:
+        for _ in range(args.polls):
+            start = time.perf_counter()
+            try:
+                await client.read_all_data()
+            except ModbusException:
+                results.append((time.perf_counter() - start, False))
+            else:
+                results.append((time.perf_counter() - start, True))
+    finally:
+        await client.close()
+    return results
+
+
+def poll_sync(args: argparse.Namespace, host: str, port: int, slave: int) -> list[tuple[float, bool]]:
+    """Poll one inverter with the blocking client."""
+    client = GrowattModbusClient(
+        host, port, slave, args.timeout, args.max_gap, args.profile
+    )
+    results = []
+    try:
+        for _ in range(args.polls):
+            start = time.perf_counter()
+            try:
+                client.read_all_data()
+            except ModbusException:
+                results.append((time.perf_counter() - start, False))
+            else:
+                results.append((time.perf_counter() - start, True))
+    finally:
+        client._client.close()
+    return results
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the benchmark and print a report."""
+    simulator = None
+    host, port = args.host, args.port
+    slaves = list(range(1, args.inverters + 1))
+
+    if host is None:
+        simulator = InverterSimulator(
+            SimulatorConfig(
+                slaves=tuple(slaves),
+                profile=args.profile,
+                latency=args.latency,
+                jitter=args.jitter,
+                drop_rate=args.drop_rate,
+                strict=args.strict,
+                max_connections=args.max_connections,
+                seed=args.seed,
+                framing="tcp" if args.transport == TRANSPORT_TCP else "rtu",
+                pipeline=(
+                    args.gateway_pipeline
+                    if args.gateway_pipeline is not None
+                    else PIPELINE_DEPTH if args.pipelining else 0
+                ),
+            )
+        )
+        if args.transport == TRANSPORT_SERIAL:
+            host = await simulator.start_pty()
+        else:
+            await simulator.start()
+            host, port = "127.0.0.1", simulator.port
+
+    start = time.perf_counter()
+    try:
+        if args.client == "async":
+            results = await asyncio.gather(
+                *(poll_async(args, host, port, slave) for slave in slaves)
+            )
+        else:
+            results = await asyncio.gather(
+                *(
+                    asyncio.to_thread(poll_sync, args, host, port, slave)
+                    for slave in slaves
+                )
+            )
+    finally:
+        elapsed = time.perf_counter() - start
+        if simulator is not None:
+            await simulator.stop()
+
+    samples = [sample for result in results for sample in result]
+    latencies = [latency * 1000 for latency, ok in samples if ok]
+    p50, p95, p99 = percentiles(latencies)
+    total_polls = len(samples)
+
+    where = host if args.transport == TRANSPORT_SERIAL else f"{host}:{port}"
+    print(f"client:           {args.client}, {len(slaves)} inverter(s) on {where} ({args.transport})")
+    print(f"polls:            {total_polls} in {elapsed:.2f} s, {total_polls - len(latencies)} failed")
+    print(f"polls/sec:        {total_polls / elapsed:.1f}")
+    if simulator is not None:
+        stats = simulator.stats
+        print(f"round trips/poll: {stats.requests / total_polls:.2f}")
+        print(f"bytes/poll:       {(stats.bytes_in + stats.bytes_out) / total_polls:.0f}")
+        print(
+            f"connections:      {stats.connections} "
+            f"({stats.refused} refused, {stats.dropped} frames dropped, "
+            f"{stats.exceptions} exceptions)"
+        )
+    print(f"latency ms (ok):  p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--client", choices=("async", "sync"), default="async")
+    parser.add_argument("--host", help="poll a real device (or serial port) instead of the simulator")
+    parser.add_argument(
+        "--transport",
+        choices=(TRANSPORT_TCP, TRANSPORT_RTU_OVER_TCP, TRANSPORT_SERIAL),
+        default=TRANSPORT_TCP,
+    )
+    parser.add_argument("--baudrate", type=int, default=DEFAULT_BAUDRATE)
+    parser.add_argument("--pipelining", action="store_true", help="send the reads of a poll at once")
+    parser.add_argument(
+        "--gateway-pipeline",
+        type=int,
+        help="transactions the simulator serves at once, 0 for one at a time "
+        "(default: as many as the client pipelines with --pipelining)",
+    )
+    parser.add_argument("--port", type=int, default=502)
+    parser.add_argument("--inverters", type=int, default=1, help="slaves polled concurrently")
+    parser.add_argument("--polls", type=int, default=100, help="polls per inverter")
+    parser.add_argument("--timeout", type=float, default=5)
+    parser.add_argument("--max-gap", type=int, default=DEFAULT_MAX_GAP)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--strict", action="store_true")
+    parser.add_argument("--max-connections", type=int)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    if args.client == "sync" and (args.transport != TRANSPORT_TCP or args.pipelining):
+        parser.error("the sync client only supports --transport tcp without pipelining")
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(run(_parse_args()))
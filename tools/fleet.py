@@ -0,0 +1,749 @@
+"""Headless poller for fleets of Growatt inverters.
+
+Polls many inverters concurrently on one asyncio loop with the
+integration's client and register maps, without Home Assistant. Inverters
+behind the same host share one connection, and at most --per-host polls
+run against a host at a time. Every poll is written to stdout or a file as
+text or JSON lines, and the sustained polls/sec is reported on stderr.
+With --workers, the fleet is sharded over that many processes by a
+supervisor that balances them by CPU cost and restarts crashed ones.
+
+The fleet file is a JSON list of inverters, only the host is required:
+
+    [
+      {"name": "roof-1", "host": "10.0.0.21"},
+      {"name": "barn", "host": "10.0.0.40", "port": 8899, "slave": 3,
+       "profile": "mod", "transport": "rtu_over_tcp"}
+    ]
+
+    python tools/fleet.py --fleet fleet.json --interval 10 --output polls.jsonl
+    python tools/fleet.py --simulate 200 --hosts 20 --interval 1 --duration 60 --output /dev/null
+    python tools/fleet.py --fleet fleet.json --workers 8 --output polls.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, BinaryIO, TextIO
+
+from pymodbus.exceptions import ModbusException
+
+import integration  # noqa: F401
+
+from growatt_modbus.const import (
+    DEFAULT_BAUDRATE,
+    DEFAULT_MAX_GAP,
+    DEFAULT_PORT,
+    DEFAULT_PROFILE,
+    DEFAULT_SLAVE,
+    DEFAULT_TRANSPORT,
+)
+from growatt_modbus.modbus_client import AsyncGrowattModbusClient
+from growatt_modbus.profiles import PROFILES
+from benchmark import percentiles
+from simulator import InverterSimulator, SimulatorConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between the statistics workers send to the supervisor
+WORKER_STATS_INTERVAL = 1.0
+# Shards are rebalanced once the heaviest costs this much more than the
+# lightest, relative to the heaviest
+REBALANCE_THRESHOLD = 0.2
+# Workers dying within RESTART_RESET seconds of starting are restarted after
+# 1, 3, 7... seconds, up to MAX_RESTART_DELAY
+RESTART_RESET = 60
+MAX_RESTART_DELAY = 60
+WORKER_STOP_TIMEOUT = 5
+
+
+@dataclass(frozen=True)
+class FleetDevice:
+    """One inverter of the fleet."""
+
+    name: str
+    host: str
+    port: int = DEFAULT_PORT
+    slave: int = DEFAULT_SLAVE
+    profile: str = DEFAULT_PROFILE
+    transport: str = DEFAULT_TRANSPORT
+    baudrate: int = DEFAULT_BAUDRATE
+    pipelining: bool = False
+
+    @property
+    def endpoint(self) -> tuple[str, int]:
+        """Return the host and port the inverter is reached through."""
+        return self.host, self.port
+
+
+def load_fleet(path: str) -> list[FleetDevice]:
+    """Load the inverters of a fleet file."""
+    with open(path, encoding="utf-8") as file:
+        raw = json.load(file)
+    devices = []
+    for item in raw:
+        item = dict(item)
+        item.setdefault(
+            "name",
+            f"{item['host']}:{item.get('port', DEFAULT_PORT)}/{item.get('slave', DEFAULT_SLAVE)}",
+        )
+        devices.append(FleetDevice(**item))
+    return devices
+
+
+@dataclass
+class FleetStats:
+    """Poll counters of the fleet, reset after every report."""
+
+    polls: int = 0
+    failed: int = 0
+    overruns: int = 0
+    latencies: list[float] = field(default_factory=list)
+    # Values decoded per inverter, the share of the work each one causes
+    values: Counter[str] = field(default_factory=Counter)
+
+    def record(self, device: FleetDevice, latency: float, data: dict[str, Any] | None) -> None:
+        """Record a finished poll, data is None if it failed."""
+        self.polls += 1
+        if data is None:
+            self.failed += 1
+        else:
+            self.latencies.append(latency)
+            self.values[device.name] += len(data)
+
+    def merge(self, other: "FleetStats") -> None:
+        """Add the counters of another period or worker."""
+        self.polls += other.polls
+        self.failed += other.failed
+        self.overruns += other.overruns
+        self.latencies.extend(other.latencies)
+        self.values.update(other.values)
+
+
+class Sink:
+    """Writes poll results as text or JSON lines.
+
+    Lines are collected in memory and written by a background task every
+    flush interval, so a slow disk or terminal never holds up the polls.
+    """
+
+    def __init__(self, stream: TextIO, fmt: str = "jsonl", flush_interval: float = 1.0):
+        """Initialize the sink."""
+        self._stream = stream
+        self._format = fmt
+        self._flush_interval = flush_interval
+        self._lines: list[str] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start writing in the background."""
+        self._task = asyncio.create_task(self._run())
+
+    def write(self, device: FleetDevice, timestamp: float, data: dict[str, Any] | None, error: str | None = None) -> None:
+        """Queue the result of one poll."""
+        if self._format == "jsonl":
+            record = {"time": round(timestamp, 3), "device": device.name}
+            if error is None:
+                # Drop the binary noise of scaled values, e.g. 352.40000000000003
+                record.update(
+                    (key, round(value, 4) if isinstance(value, float) else value)
+                    for key, value in data.items()
+                )
+            else:
+                record["error"] = error
+            self._lines.append(json.dumps(record, separators=(",", ":")))
+            return
+
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp))
+        if error is None:
+            values = " ".join(
+                f"{key}={value:g}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in data.items()
+            )
+        else:
+            values = f"error={error}"
+        self._lines.append(f"{stamp} {device.name} {values}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the queued lines."""
+        if not self._lines:
+            return
+        lines, self._lines = self._lines, []
+        await asyncio.to_thread(self._write, "\n".join(lines) + "\n")
+
+    def _write(self, text: str) -> None:
+        self._stream.write(text)
+        self._stream.flush()
+
+    async def close(self) -> None:
+        """Stop the background task and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+class FleetPoller:
+    """Polls every inverter of a fleet at a fixed interval.
+
+    First polls are spread over one interval, so the fleet does not hit the
+    network at once. A poll that overruns the interval starts the next one
+    right away without trying to catch up.
+    """
+
+    def __init__(
+        self,
+        sink: Sink,
+        interval: float,
+        per_host: int = 1,
+        timeout: float = 5,
+        max_gap: int = DEFAULT_MAX_GAP,
+    ):
+        """Initialize the poller."""
+        self.sink = sink
+        self.interval = interval
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_gap = max_gap
+        self.stats = FleetStats()
+        self._limits: dict[tuple[str, int], asyncio.Semaphore] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def assign(self, devices: list[FleetDevice]) -> None:
+        """Poll exactly these inverters from now on.
+
+        Inverters no longer listed stop, new ones start spread over one
+        interval and the others keep their schedule.
+        """
+        wanted = {device.name: device for device in devices}
+        for name in self._tasks.keys() - wanted.keys():
+            self._tasks.pop(name).cancel()
+        added = [device for name, device in wanted.items() if name not in self._tasks]
+        for index, device in enumerate(added):
+            self._tasks[device.name] = asyncio.create_task(
+                self._poll_device(device, self.interval * index / len(added))
+            )
+
+    async def close(self) -> None:
+        """Stop polling and close the connections."""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _poll_device(self, device: FleetDevice, delay: float) -> None:
+        """Poll one inverter until cancelled."""
+        client = AsyncGrowattModbusClient(
+            device.host,
+            device.port,
+            device.slave,
+            self.timeout,
+            self.max_gap,
+            device.profile,
+            device.transport,
+            device.baudrate,
+            device.pipelining,
+        )
+        limit = self._limits.get(device.endpoint)
+        if limit is None:
+            limit = self._limits[device.endpoint] = asyncio.Semaphore(self.per_host)
+        try:
+            await asyncio.sleep(delay)
+            next_poll = time.monotonic()
+            while True:
+                async with limit:
+                    start = time.monotonic()
+                    try:
+                        data = await client.read_all_data()
+                    except ModbusException as err:
+                        self.stats.record(device, time.monotonic() - start, None)
+                        self.sink.write(device, time.time(), None, str(err))
+                    else:
+                        self.stats.record(device, time.monotonic() - start, data)
+                        self.sink.write(device, time.time(), data)
+
+                next_poll += self.interval
+                delay = next_poll - time.monotonic()
+                if delay < 0:
+                    self.stats.overruns += 1
+                    next_poll -= delay
+                    delay = 0
+                await asyncio.sleep(delay)
+        finally:
+            await client.close()
+
+
+def report(stats: FleetStats, elapsed: float, devices: int) -> str:
+    """Return a one line summary of the polls since the last report."""
+    p50, p95, p99 = percentiles([latency * 1000 for latency in stats.latencies])
+    return (
+        f"{devices} inverters: {stats.polls / elapsed:.1f} polls/sec, "
+        f"{stats.failed} failed, {stats.overruns} overran, "
+        f"latency ms p50 {p50:.1f} p95 {p95:.1f} p99 {p99:.1f}"
+    )
+
+
+async def _start_simulators(
+    args: argparse.Namespace, hosts: Iterable[int] | None = None
+) -> tuple[list[InverterSimulator], list[FleetDevice]]:
+    """Serve the simulated fleet, its inverters spread evenly over the hosts.
+
+    With hosts, only the simulators of those host indices are started.
+    """
+    count = max(1, min(args.hosts, args.simulate))
+    simulators = []
+    devices = []
+    for host in range(count) if hosts is None else hosts:
+        slaves = tuple(range(1, args.simulate // count + (host < args.simulate % count) + 1))
+        simulator = InverterSimulator(
+            SimulatorConfig(
+                slaves=slaves,
+                profile=args.profile,
+                latency=args.latency,
+                jitter=args.jitter,
+                drop_rate=args.drop_rate,
+                seed=args.seed,
+            )
+        )
+        await simulator.start()
+        simulators.append(simulator)
+        devices.extend(
+            FleetDevice(
+                name=f"sim-{host + 1}-{slave}",
+                host="127.0.0.1",
+                port=simulator.port,
+                slave=slave,
+                profile=args.profile,
+            )
+            for slave in slaves
+        )
+    return simulators, devices
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Poll the fleet in this process and report its throughput."""
+    simulators = []
+    if args.simulate:
+        simulators, devices = await _start_simulators(args)
+    else:
+        devices = load_fleet(args.fleet)
+
+    stream = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    sink = Sink(stream, args.format, args.flush_interval)
+    poller = FleetPoller(sink, args.interval, args.per_host, args.timeout, args.max_gap)
+
+    sink.start()
+    poller.assign(devices)
+    started = reported = time.monotonic()
+    total = FleetStats()
+    try:
+        while args.duration is None or time.monotonic() < started + args.duration:
+            wait = args.report_interval
+            if args.duration is not None:
+                wait = min(wait, started + args.duration - time.monotonic())
+            await asyncio.sleep(wait)
+            now = time.monotonic()
+            stats, poller.stats = poller.stats, FleetStats()
+            total.merge(stats)
+            print(report(stats, now - reported, len(devices)), file=sys.stderr)
+            reported = now
+    finally:
+        await poller.close()
+        await sink.close()
+        if stream is not sys.stdout:
+            stream.close()
+        for simulator in simulators:
+            await simulator.stop()
+
+    print(f"total: {report(total, time.monotonic() - started, len(devices))}", file=sys.stderr)
+
+
+# Sharding over worker processes
+#
+# The supervisor splits the fleet into shards of whole hosts, so inverters
+# sharing a connection stay together, and runs a FleetPoller per shard in a
+# worker process. Workers serialize their lines themselves and send them to
+# the supervisor as raw bytes, which it appends to the output unchanged.
+# Only assignments and the per second statistics are pickled.
+
+
+class _PipeStream:
+    """Text stream sending what is written through a pipe as bytes."""
+
+    def __init__(self, connection: Connection):
+        self._connection = connection
+
+    def write(self, text: str) -> None:
+        self._connection.send_bytes(text.encode())
+
+    def flush(self) -> None:
+        pass
+
+
+def _worker_main(
+    args: argparse.Namespace,
+    devices: list[FleetDevice],
+    output: Connection,
+    control: Connection,
+) -> None:
+    """Poll a shard of the fleet in a worker process."""
+    # The supervisor handles Ctrl-C and stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_worker(args, devices, output, control))
+
+
+async def _worker(
+    args: argparse.Namespace,
+    devices: list[FleetDevice],
+    output: Connection,
+    control: Connection,
+) -> None:
+    """Poll the assigned inverters until the supervisor stops the worker.
+
+    The supervisor sends new assignments, or None to stop, and receives the
+    poll statistics and CPU time of every WORKER_STATS_INTERVAL.
+    """
+    loop = asyncio.get_running_loop()
+    sink = Sink(_PipeStream(output), args.format, args.flush_interval)
+    poller = FleetPoller(sink, args.interval, args.per_host, args.timeout, args.max_gap)
+    stopped = asyncio.Event()
+
+    def receive() -> None:
+        try:
+            message = control.recv()
+        except (EOFError, OSError):
+            message = None
+        if message is None:
+            loop.remove_reader(control.fileno())
+            stopped.set()
+        else:
+            poller.assign(message)
+
+    loop.add_reader(control.fileno(), receive)
+    sink.start()
+    poller.assign(devices)
+    cpu = time.process_time()
+    try:
+        while not stopped.is_set():
+            try:
+                await asyncio.wait_for(stopped.wait(), WORKER_STATS_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            stats, poller.stats = poller.stats, FleetStats()
+            used, cpu = time.process_time() - cpu, time.process_time()
+            try:
+                await asyncio.to_thread(control.send, (stats, used))
+            except (BrokenPipeError, OSError):
+                break
+    finally:
+        await poller.close()
+        await sink.close()
+
+
+def _simulator_main(args: argparse.Namespace, hosts: list[int], control: Connection) -> None:
+    """Serve some hosts of the simulated fleet in a separate process."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    async def serve() -> None:
+        simulators, devices = await _start_simulators(args, hosts)
+        control.send(devices)
+        try:
+            await asyncio.to_thread(control.recv)
+        except EOFError:
+            pass
+        finally:
+            for simulator in simulators:
+                await simulator.stop()
+
+    asyncio.run(serve())
+
+
+@dataclass
+class _Worker:
+    """A worker process and the supervisor's ends of its pipes."""
+
+    process: BaseProcess
+    control: Connection
+    started: float
+    crashes: int = 0
+    restart_at: float | None = None
+
+
+class Supervisor:
+    """Runs shards of a fleet in worker processes.
+
+    Shards start balanced by inverter count. Every worker reports the CPU
+    time it used, which is attributed to its hosts by the values they
+    decoded. Once a shard costs REBALANCE_THRESHOLD more than the lightest
+    one, hosts move from the heavy to the light shard. Workers that die are
+    restarted with their shard, after a growing delay if they keep dying
+    right after starting.
+    """
+
+    def __init__(self, args: argparse.Namespace, devices: list[FleetDevice], output: BinaryIO):
+        """Initialize the supervisor."""
+        self._args = args
+        self._output = output
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+        self._groups: dict[tuple[str, int], list[FleetDevice]] = {}
+        for device in devices:
+            self._groups.setdefault(device.endpoint, []).append(device)
+        self._endpoints = {device.name: device.endpoint for device in devices}
+        # CPU seconds per second of each host, its inverter count until measured
+        self._cost = {endpoint: float(len(group)) for endpoint, group in self._groups.items()}
+        self._measured: set[tuple[str, int]] = set()
+        self._shards: list[set[tuple[str, int]]] = [set() for _ in range(args.workers)]
+        self._workers: list[_Worker] = []
+        self._threads: list[threading.Thread] = []
+        self.stats = FleetStats()
+        self.cpu = [0.0] * args.workers
+
+        loads = [0.0] * args.workers
+        for endpoint in sorted(self._groups, key=self._cost.__getitem__, reverse=True):
+            index = loads.index(min(loads))
+            self._shards[index].add(endpoint)
+            loads[index] += self._cost[endpoint]
+
+    def _devices(self, index: int) -> list[FleetDevice]:
+        return [device for endpoint in self._shards[index] for device in self._groups[endpoint]]
+
+    def start(self) -> None:
+        """Start the workers."""
+        self._workers = [self._start_worker(index) for index in range(len(self._shards))]
+
+    def _start_worker(self, index: int) -> _Worker:
+        output, child_output = self._context.Pipe(duplex=False)
+        control, child_control = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self._args, self._devices(index), child_output, child_control),
+            name=f"fleet-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        # Only the worker holds the write ends, so their pipes end with it
+        child_output.close()
+        child_control.close()
+        thread = threading.Thread(target=self._copy_output, args=(output,), daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return _Worker(process, control, time.monotonic())
+
+    def _copy_output(self, output: Connection) -> None:
+        """Append the lines of a worker to the output until it exits."""
+        with output:
+            while True:
+                try:
+                    chunk = output.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                with self._lock:
+                    self._output.write(chunk)
+
+    def collect(self) -> None:
+        """Gather the statistics of the workers and restart dead ones."""
+        now = time.monotonic()
+        for index, worker in enumerate(self._workers):
+            while True:
+                try:
+                    if not worker.control.poll():
+                        break
+                    stats, cpu = worker.control.recv()
+                except (EOFError, OSError):
+                    break
+                self.stats.merge(stats)
+                self.cpu[index] += cpu
+                self._measure(stats, cpu)
+
+            if worker.process.is_alive():
+                continue
+            if worker.restart_at is None:
+                uptime = now - worker.started
+                crashes = worker.crashes + 1 if uptime < RESTART_RESET else 0
+                delay = min(MAX_RESTART_DELAY, 2**crashes - 1)
+                _LOGGER.warning(
+                    f"Worker {index} exited with code {worker.process.exitcode}, "
+                    f"restarting in {delay} s"
+                )
+                worker.crashes = crashes
+                worker.restart_at = now + delay
+            if now >= worker.restart_at:
+                worker.control.close()
+                crashes = worker.crashes
+                worker = self._workers[index] = self._start_worker(index)
+                worker.crashes = crashes
+
+    def _measure(self, stats: FleetStats, cpu: float) -> None:
+        """Attribute the CPU time of a worker to its hosts."""
+        values: Counter[tuple[str, int]] = Counter()
+        for name, count in stats.values.items():
+            values[self._endpoints[name]] += count
+        total = sum(values.values())
+        if not total:
+            return
+        for endpoint, count in values.items():
+            cost = cpu * count / total / WORKER_STATS_INTERVAL
+            if endpoint in self._measured:
+                cost = (self._cost[endpoint] + cost) / 2
+            self._cost[endpoint] = cost
+            self._measured.add(endpoint)
+
+    def rebalance(self) -> None:
+        """Move hosts from the heaviest to the lightest shards."""
+        if len(self._measured) < len(self._groups) or not all(
+            worker.process.is_alive() for worker in self._workers
+        ):
+            return
+        loads = [sum(self._cost[endpoint] for endpoint in shard) for shard in self._shards]
+        changed = set()
+        for _ in range(len(self._groups)):
+            heavy = loads.index(max(loads))
+            light = loads.index(min(loads))
+            gap = loads[heavy] - loads[light]
+            if gap <= REBALANCE_THRESHOLD * loads[heavy]:
+                break
+            # The host whose move leaves the two shards closest to equal
+            endpoint = min(
+                self._shards[heavy], key=lambda endpoint: abs(gap - 2 * self._cost[endpoint])
+            )
+            if abs(gap - 2 * self._cost[endpoint]) >= gap:
+                break
+            self._shards[heavy].remove(endpoint)
+            self._shards[light].add(endpoint)
+            loads[heavy] -= self._cost[endpoint]
+            loads[light] += self._cost[endpoint]
+            changed.update((heavy, light))
+        for index in changed:
+            _LOGGER.info(f"Worker {index} now polls {len(self._shards[index])} hosts")
+            self._workers[index].control.send(self._devices(index))
+
+    def stop(self) -> None:
+        """Stop the workers and write their remaining output."""
+        for worker in self._workers:
+            try:
+                worker.control.send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.process.join(WORKER_STOP_TIMEOUT)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.control.close()
+        for thread in self._threads:
+            thread.join()
+        self._output.flush()
+
+
+def supervise(args: argparse.Namespace) -> None:
+    """Poll the fleet in worker processes and report its throughput."""
+    context = multiprocessing.get_context("spawn")
+    simulators = []
+    if args.simulate:
+        # Simulators get processes of their own, so they do not compete
+        # with the workers they are measured with
+        count = max(1, min(args.hosts, args.simulate))
+        devices = []
+        for index in range(min(args.workers, count)):
+            control, child_control = context.Pipe()
+            process = context.Process(
+                target=_simulator_main,
+                args=(args, list(range(index, count, args.workers)), child_control),
+                daemon=True,
+            )
+            process.start()
+            child_control.close()
+            devices.extend(control.recv())
+            simulators.append((process, control))
+    else:
+        devices = load_fleet(args.fleet)
+
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "ab")
+    supervisor = Supervisor(args, devices, output)
+    supervisor.start()
+    started = reported = time.monotonic()
+    total = FleetStats()
+    try:
+        while args.duration is None or time.monotonic() < started + args.duration:
+            time.sleep(WORKER_STATS_INTERVAL)
+            supervisor.collect()
+            now = time.monotonic()
+            if now - reported < args.report_interval:
+                continue
+            supervisor.rebalance()
+            elapsed = now - reported
+            loads = " ".join(f"{cpu / elapsed:.2f}" for cpu in supervisor.cpu)
+            print(f"{report(supervisor.stats, elapsed, len(devices))}, cpu {loads}", file=sys.stderr)
+            total.merge(supervisor.stats)
+            supervisor.stats = FleetStats()
+            supervisor.cpu = [0.0] * args.workers
+            reported = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+        total.merge(supervisor.stats)
+        if output is not sys.stdout.buffer:
+            output.close()
+        for process, control in simulators:
+            control.close()
+            process.join(WORKER_STOP_TIMEOUT)
+
+    print(f"total: {report(total, time.monotonic() - started, len(devices))}", file=sys.stderr)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--fleet", help="JSON file listing the inverters")
+    source.add_argument("--simulate", type=int, help="poll this many simulated inverters")
+    parser.add_argument("--hosts", type=int, default=1, help="simulated hosts the inverters are spread over")
+    parser.add_argument("--interval", type=float, default=10, help="seconds between polls of an inverter")
+    parser.add_argument("--workers", type=int, default=1, help="processes the fleet is sharded over")
+    parser.add_argument("--per-host", type=int, default=1, help="polls running against a host at once")
+    parser.add_argument("--output", default="-", help="file to append to, - for stdout")
+    parser.add_argument("--format", choices=("jsonl", "text"), default="jsonl")
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--report-interval", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=5)
+    parser.add_argument("--max-gap", type=int, default=DEFAULT_MAX_GAP)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE, help="profile of simulated inverters")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    arguments = _parse_args()
+    if arguments.workers > 1:
+        supervise(arguments)
+    else:
+        try:
+            asyncio.run(run(arguments))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,30 @@
+"""Import the integration modules outside of Home Assistant.
+
+The package ``__init__`` imports Home Assistant, which the standalone tools
+do not need. This registers the integration directory as the
+``growatt_modbus`` package without executing it, so modules such as
+``growatt_modbus.modbus_client`` can be imported directly.
+"""
+import importlib.machinery
+import importlib.util
+import pathlib
+import sys
+
+INTEGRATION_DIR = (
+    pathlib.Path(__file__).resolve().parent.parent
+    / "custom_components"
+    / "growatt_modbus"
+)
+
+
+def load() -> None:
+    """Register the integration package if it is not imported yet."""
+    if "growatt_modbus" in sys.modules:
+        return
+    spec = importlib.machinery.ModuleSpec("growatt_modbus", None, is_package=True)
+    package = importlib.util.module_from_spec(spec)
+    package.__path__ = [str(INTEGRATION_DIR)]
+    sys.modules["growatt_modbus"] = package
+
+
+load()
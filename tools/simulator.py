@@ -0,0 +1,443 @@
+"""Modbus simulator for Growatt inverters.
+
+Serves the register map of an inverter profile (MIN by default) over Modbus
+TCP so the client can be exercised and benchmarked without an inverter.
+Latency, jitter, dropped frames, illegal address exceptions and a
+connection limit can be configured to mimic real ShineLAN/ShineWiFi
+dongles, and --pipeline serves several transactions at once like some
+Modbus TCP gateways. With RTU framing it stands in for a transparent
+serial gateway, or for an RS485 adapter when served on a pseudo terminal.
+
+    python tools/simulator.py --port 5020 --latency 0.08 --jitter 0.04 --profile mod
+    python tools/simulator.py --framing rtu --port 5020
+    python tools/simulator.py --pipeline 8 --latency 0.1
+    python tools/simulator.py --pty
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import struct
+import tty
+from dataclasses import dataclass, field
+
+import integration  # noqa: F401
+
+from growatt_modbus.const import (
+    DEFAULT_PROFILE,
+    DEVICE_TYPE_REGISTER,
+    SERIAL_REGISTER,
+    SERIAL_REGISTER_COUNT,
+)
+from growatt_modbus.profiles import PROFILES, get_profile
+from growatt_modbus.read_plan import register_count
+from growatt_modbus.transport import crc16
+
+_LOGGER = logging.getLogger(__name__)
+
+# Modbus exception codes
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+
+# Engineering values served for the register maps, other keys read 0
+DEFAULT_VALUES = {
+    "status": 1,
+    "pv1_voltage": 352.4,
+    "pv1_current": 6.2,
+    "pv2_voltage": 348.9,
+    "pv2_current": 5.8,
+    "ac_power": 4012.5,
+    "ac_frequency": 50.01,
+    "ac_voltage": 231.2,
+    "ac_current": 17.3,
+    "ac_voltage_l2": 230.8,
+    "ac_current_l2": 17.1,
+    "ac_voltage_l3": 232.0,
+    "ac_current_l3": 17.4,
+    "today_energy": 18.4,
+    "total_energy": 12873.2,
+    "temperature": 41.3,
+    "battery_charge_power": 1250.0,
+    "battery_discharge_power": 0,
+    "battery_voltage": 52.6,
+    "battery_soc": 64,
+    "cmd_memory": 0,
+    "power_limit": 100,
+    "inverter_enable": 1,
+}
+
+# Covers the storage registers of SPH units at 1000-1124
+REGISTER_SPACE = 1125
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour of the simulated inverter and its dongle."""
+
+    slaves: tuple[int, ...] = (1,)
+    framing: str = "tcp"
+    profile: str = DEFAULT_PROFILE
+    serial: str = "SIM0000001"
+    latency: float = 0.0
+    jitter: float = 0.0
+    drop_rate: float = 0.0
+    strict: bool = False
+    illegal_addresses: frozenset[int] = frozenset()
+    max_connections: int | None = None
+    # Modbus TCP transactions served concurrently per connection, requests
+    # beyond that are dropped; 0 answers one request after the other
+    pipeline: int = 0
+    seed: int | None = None
+
+
+@dataclass
+class SimulatorStats:
+    """Counters collected by the simulator."""
+
+    connections: int = 0
+    refused: int = 0
+    requests: int = 0
+    dropped: int = 0
+    exceptions: int = 0
+    crc_errors: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    per_function: dict[int, int] = field(default_factory=dict)
+
+
+class InverterSimulator:
+    """An asyncio Modbus TCP server emulating Growatt inverters."""
+
+    def __init__(self, config: SimulatorConfig | None = None):
+        """Initialize the simulator."""
+        self.config = config or SimulatorConfig()
+        self.stats = SimulatorStats()
+        self._random = random.Random(self.config.seed)
+        self._server: asyncio.AbstractServer | None = None
+        self._pty: tuple[int, int] | None = None
+        self._pty_transport: asyncio.ReadTransport | None = None
+        self._active = 0
+        self._handlers: set[asyncio.Task] = set()
+        self.profile = get_profile(self.config.profile)
+        self._mapped = {
+            "input": set(),
+            "holding": set(range(SERIAL_REGISTER, DEVICE_TYPE_REGISTER + 1)),
+        }
+        self.registers = {
+            slave: {
+                "input": [0] * REGISTER_SPACE,
+                "holding": [0] * REGISTER_SPACE,
+            }
+            for slave in self.config.slaves
+        }
+
+        for key, reg_info in self.profile.registers.items():
+            count = register_count(reg_info)
+            self._mapped[reg_info["type"]].update(
+                range(reg_info["address"], reg_info["address"] + count)
+            )
+            for slave in self.config.slaves:
+                self.set_value(key, DEFAULT_VALUES.get(key, 0), slave)
+
+        serial = self.config.serial.encode("ascii").ljust(2 * SERIAL_REGISTER_COUNT)
+        for slave in self.config.slaves:
+            holding = self.registers[slave]["holding"]
+            holding[SERIAL_REGISTER:SERIAL_REGISTER + SERIAL_REGISTER_COUNT] = struct.unpack(
+                f">{SERIAL_REGISTER_COUNT}H", serial[:2 * SERIAL_REGISTER_COUNT]
+            )
+            holding[DEVICE_TYPE_REGISTER] = self.profile.device_type_codes[0][0]
+
+    @property
+    def port(self) -> int:
+        """Return the port the server is listening on."""
+        return self._server.sockets[0].getsockname()[1]
+
+    def set_value(self, key: str, value: float, slave: int = 1) -> None:
+        """Store an engineering value for a key of the register map."""
+        reg_info = self.profile.registers[key]
+        raw = round(value / reg_info.get("scale", 1))
+        table = self.registers[slave][reg_info["type"]]
+        address = reg_info["address"]
+        if register_count(reg_info) == 2:
+            raw &= 0xFFFFFFFF
+            table[address] = raw >> 16
+            table[address + 1] = raw & 0xFFFF
+        else:
+            table[address] = raw & 0xFFFF
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start serving, port 0 picks a free port."""
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    async def start_pty(self) -> str:
+        """Serve RTU frames on a pseudo terminal and return its device path."""
+        loop = asyncio.get_running_loop()
+        master, slave = os.openpty()
+        tty.setraw(master)
+        tty.setraw(slave)
+        self._pty = (master, slave)
+
+        reader = asyncio.StreamReader()
+        self._pty_transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader),
+            os.fdopen(os.dup(master), "rb", buffering=0),
+        )
+        handler = loop.create_task(self._serve_rtu(reader, _FdWriter(master)))
+        self._handlers.add(handler)
+        handler.add_done_callback(self._handlers.discard)
+        return os.ttyname(slave)
+
+    async def stop(self) -> None:
+        """Stop serving and drop all client connections."""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for handler in list(self._handlers):
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._pty is not None:
+            self._pty_transport.close()
+            for fd in self._pty:
+                os.close(fd)
+            self._pty = None
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve requests of one client, one at a time like a dongle.
+
+        With pipelining configured, requests are answered concurrently up to
+        the configured number; further ones are dropped.
+        """
+        limit = self.config.max_connections
+        if limit is not None and self._active >= limit:
+            self.stats.refused += 1
+            writer.close()
+            return
+
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        self._active += 1
+        self.stats.connections += 1
+        try:
+            if self.config.framing == "rtu":
+                await self._serve_rtu(reader, writer)
+                return
+            in_flight: set[asyncio.Task] = set()
+            try:
+                while True:
+                    header = await reader.readexactly(7)
+                    transaction, protocol, length, unit = struct.unpack(">HHHB", header)
+                    pdu = await reader.readexactly(length - 1)
+                    self.stats.requests += 1
+                    self.stats.bytes_in += len(header) + len(pdu)
+
+                    if not self.config.pipeline:
+                        await self._respond_tcp(writer, transaction, protocol, unit, pdu)
+                    elif sum(not task.done() for task in in_flight) >= self.config.pipeline:
+                        # Like a gateway with a full transaction table
+                        self.stats.dropped += 1
+                    else:
+                        task = asyncio.create_task(
+                            self._respond_tcp(writer, transaction, protocol, unit, pdu)
+                        )
+                        in_flight.add(task)
+                        task.add_done_callback(in_flight.discard)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(handler)
+            self._active -= 1
+            writer.close()
+
+    async def _respond_tcp(
+        self,
+        writer: asyncio.StreamWriter,
+        transaction: int,
+        protocol: int,
+        unit: int,
+        pdu: bytes,
+    ) -> None:
+        """Answer one Modbus TCP request after the configured latency."""
+        delay = self.config.latency + self._random.uniform(
+            -self.config.jitter, self.config.jitter
+        )
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self._random.random() < self.config.drop_rate:
+            self.stats.dropped += 1
+            return
+        if unit not in self.registers:
+            # Gateways stay silent for slaves that do not answer
+            return
+
+        response = self.handle_pdu(unit, pdu)
+        frame = struct.pack(">HHHB", transaction, protocol, len(response) + 1, unit)
+        writer.write(frame + response)
+        self.stats.bytes_out += len(frame) + len(response)
+        await writer.drain()
+
+    async def _serve_rtu(self, reader: asyncio.StreamReader, writer) -> None:
+        """Serve RTU frames until the stream ends."""
+        while True:
+            header = await reader.readexactly(2)
+            if header[1] == 0x10:
+                body = await reader.readexactly(5)
+                body += await reader.readexactly(body[4] + 2)
+            else:
+                # Address, count or value, and CRC
+                body = await reader.readexactly(6)
+            frame = header + body
+            self.stats.requests += 1
+            self.stats.bytes_in += len(frame)
+
+            if crc16(frame[:-2]) != int.from_bytes(frame[-2:], "little"):
+                # Slaves ignore corrupt frames
+                self.stats.crc_errors += 1
+                continue
+
+            delay = self.config.latency + self._random.uniform(
+                -self.config.jitter, self.config.jitter
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if self._random.random() < self.config.drop_rate:
+                self.stats.dropped += 1
+                continue
+            unit = frame[0]
+            if unit not in self.registers:
+                continue
+
+            response = bytes((unit,)) + self.handle_pdu(unit, frame[1:-2])
+            response += crc16(response).to_bytes(2, "little")
+            writer.write(response)
+            self.stats.bytes_out += len(response)
+            await writer.drain()
+
+    def handle_pdu(self, unit: int, pdu: bytes) -> bytes:
+        """Execute a request PDU and return the response PDU."""
+        function = pdu[0]
+        self.stats.per_function[function] = self.stats.per_function.get(function, 0) + 1
+
+        if function in (0x03, 0x04):
+            address, count = struct.unpack_from(">HH", pdu, 1)
+            register_type = "holding" if function == 0x03 else "input"
+            if not 1 <= count <= 125:
+                return self._exception(function, ILLEGAL_DATA_VALUE)
+            if not self._readable(register_type, address, count):
+                return self._exception(function, ILLEGAL_DATA_ADDRESS)
+            values = self.registers[unit][register_type][address:address + count]
+            return struct.pack(f">BB{count}H", function, count * 2, *values)
+
+        if function == 0x06:
+            address, value = struct.unpack_from(">HH", pdu, 1)
+            if not self._readable("holding", address, 1):
+                return self._exception(function, ILLEGAL_DATA_ADDRESS)
+            self.registers[unit]["holding"][address] = value
+            return pdu[:5]
+
+        if function == 0x10:
+            address, count, _ = struct.unpack_from(">HHB", pdu, 1)
+            if not self._readable("holding", address, count):
+                return self._exception(function, ILLEGAL_DATA_ADDRESS)
+            values = struct.unpack_from(f">{count}H", pdu, 6)
+            self.registers[unit]["holding"][address:address + count] = values
+            return pdu[:5]
+
+        return self._exception(function, ILLEGAL_FUNCTION)
+
+    def _readable(self, register_type: str, address: int, count: int) -> bool:
+        """Return True if every register of a span may be accessed."""
+        span = range(address, address + count)
+        if address + count > REGISTER_SPACE:
+            return False
+        if self.config.illegal_addresses.intersection(span):
+            return False
+        if self.config.strict:
+            return self._mapped[register_type].issuperset(span)
+        return True
+
+    def _exception(self, function: int, code: int) -> bytes:
+        """Build an exception response."""
+        self.stats.exceptions += 1
+        return bytes((function | 0x80, code))
+
+
+class _FdWriter:
+    """Minimal stream writer for the master side of a pseudo terminal."""
+
+    def __init__(self, fd: int):
+        self._fd = fd
+
+    def write(self, data: bytes) -> None:
+        os.write(self._fd, data)
+
+    async def drain(self) -> None:
+        pass
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--slaves", type=int, nargs="+", default=[1])
+    parser.add_argument("--framing", choices=("tcp", "rtu"), default="tcp")
+    parser.add_argument("--pty", action="store_true", help="serve RTU on a pseudo terminal")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="0..1")
+    parser.add_argument("--strict", action="store_true", help="reject unmapped registers")
+    parser.add_argument("--illegal", type=int, nargs="*", default=[], help="addresses to reject")
+    parser.add_argument("--max-connections", type=int)
+    parser.add_argument(
+        "--pipeline", type=int, default=0, help="concurrent TCP transactions, 0 for one at a time"
+    )
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args()
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    simulator = InverterSimulator(
+        SimulatorConfig(
+            slaves=tuple(args.slaves),
+            profile=args.profile,
+            framing="rtu" if args.pty else args.framing,
+            latency=args.latency,
+            jitter=args.jitter,
+            drop_rate=args.drop_rate,
+            strict=args.strict,
+            illegal_addresses=frozenset(args.illegal),
+            max_connections=args.max_connections,
+            pipeline=args.pipeline,
+            seed=args.seed,
+        )
+    )
+    if args.pty:
+        where = await simulator.start_pty()
+    else:
+        await simulator.start(args.host, args.port)
+        where = f"{args.host}:{simulator.port}"
+    _LOGGER.info(
+        f"Simulating {simulator.profile.name} slaves {args.slaves} "
+        f"with {simulator.config.framing} framing on {where}"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(_parse_args()))
+    except KeyboardInterrupt:
+        pass